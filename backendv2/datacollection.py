@@ -4,33 +4,64 @@ import numpy as np
 import math
 import time
 import os
+import argparse
+import sys
+
+# headless.py is shared with the top level scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+
+parser = argparse.ArgumentParser(description="Collect hand crops for training")
+headless.add_arguments(parser, modes=False)
+parser.add_argument("--folder", default="Data/Okay", help="Where to save the crops")
+parser.add_argument("--save-every", type=int, default=0,
+                    help="Headless: save every Nth frame with a hand (0 saves only on SIGUSR2)")
+parser.add_argument("--limit", type=int, default=0, help="Headless: stop after saving this many crops")
+args = parser.parse_args()
 
 # Ensure the folder exists
-folder = "Data/Okay"
+folder = args.folder
 os.makedirs(folder, exist_ok=True)
 
-cap = cv2.VideoCapture(0)
+cap = headless.FrameSource(args.source)
 detector = HandDetector(maxHands=1)
 offset = 20
 imgSize = 300
 counter = 0
+usable = 0
+imgWhite = None
+
+switch = headless.ModeSwitch()
+save_requested = False
+
+def request_save():
+    global save_requested
+    save_requested = True
+
+if args.headless:
+    switch.install_signals(on_save=request_save)
 
 try:
-    while True:
+    while switch.running:
         success, img = cap.read()
         if not success:
             print("Failed to grab frame")
+            if args.headless:
+                break
             continue
         
-        print("Frame captured")  # Debug statement
+        if not args.headless:
+            print("Frame captured")  # Debug statement
 
         hands, img = detector.findHands(img)
-        print("Hands detected:", hands)  # Debug statement
+        if not args.headless:
+            print("Hands detected:", hands)  # Debug statement
         
         if hands:
             hand = hands[0]
             x, y, w, h = hand['bbox']
-            print("Bounding box:", x, y, w, h)  # Debug statement
+            if not args.headless:
+                print("Bounding box:", x, y, w, h)  # Debug statement
 
             # Create a white background image
             imgWhite = np.ones((imgSize, imgSize, 3), np.uint8) * 255
@@ -53,17 +84,29 @@ try:
                 hGap = math.ceil((imgSize - hCal) / 2)
                 imgWhite[hGap: hCal + hGap, :] = imgResize
 
-            cv2.imshow('ImageCrop', imgCrop)
-            cv2.imshow('ImageWhite', imgWhite)
+            if not args.headless:
+                cv2.imshow('ImageCrop', imgCrop)
+                cv2.imshow('ImageWhite', imgWhite)
 
-        cv2.imshow('Image', img)
-        key = cv2.waitKey(1)
-        if key == ord("s"):
+        if args.headless:
+            key = None
+            if hands:
+                usable += 1
+                if save_requested or (args.save_every and usable % args.save_every == 0):
+                    key = ord("s")
+                    save_requested = False
+        else:
+            cv2.imshow('Image', img)
+            key = cv2.waitKey(1)
+        if key == ord("s") and imgWhite is not None:
             counter += 1
             cv2.imwrite(f'{folder}/Image_{time.time()}.jpg', imgWhite)
             print("Saved image number:", counter)
+            if args.headless and args.limit and counter >= args.limit:
+                break
 except Exception as e:
     print("An error occurred:", e)
 finally:
     cap.release()
-    cv2.destroyAllWindows()
+    if not args.headless:
+        cv2.destroyAllWindows()
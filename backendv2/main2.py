@@ -3,6 +3,12 @@ from cvzone.HandTrackingModule import HandDetector
 from cvzone.ClassificationModule import Classifier
 import numpy as np
 import math
+import os
+import sys
+
+# labels.py is shared with the server
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "client", "signsync", "lib"))
+from labels import LabelRegistry
 
 cap = cv2.VideoCapture(0)
 if not cap.isOpened():
@@ -22,7 +28,8 @@ counter = 0
 
 
 
-labels = ["Hello", "I love you", "No", "Okay", "Please", "Thank you", "Yes"]
+# Labels come from the model's labels.txt, parsed like the server does
+labels = LabelRegistry.load("Model/labels.txt").names
 
 while True:
     success, img = cap.read()
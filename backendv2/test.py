@@ -3,20 +3,46 @@ from cvzone.HandTrackingModule import HandDetector
 from cvzone.ClassificationModule import Classifier
 import numpy as np
 import math
+import argparse
+import os
+import sys
 
-cap = cv2.VideoCapture(0)
+# headless.py is shared with the top level scripts, labels.py with the server
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "client", "signsync", "lib"))
+import headless
+from labels import LabelRegistry
+
+parser = argparse.ArgumentParser(description="Real-time sign language interpreter")
+headless.add_arguments(parser, modes=False)
+parser.add_argument("--output", default="-",
+                    help="Headless label output: '-' (stdout), a JSONL file, tcp://host:port or unix:///path")
+args = parser.parse_args()
+
+cap = headless.FrameSource(args.source)
 detector = HandDetector(maxHands=1)
 classifier = Classifier("Model/keras_model.h5" , "Model/labels.txt")
 offset = 20
 imgSize = 300
 counter = 0
 
-labels = ["Hello","I love you","No","Okay","Please","Thank you","Yes"]
+# Labels come from the model's labels.txt, parsed like the server does
+labels = LabelRegistry.load("Model/labels.txt").names
 
+switch = headless.ModeSwitch()
+sink = None
+if args.headless:
+    switch.install_signals()
+    sink = headless.LabelSink(args.output)
 
-while True:
+frame = 0
+while switch.running:
     success, img = cap.read()
-    imgOutput = img.copy()
+    if not success:
+        break
+    frame += 1
+    imgOutput = img if args.headless else img.copy()
     hands, img = detector.findHands(img)
     if hands:
         hand = hands[0]
@@ -37,7 +63,8 @@ while True:
             wGap = math.ceil((imgSize-wCal)/2)
             imgWhite[:, wGap: wCal + wGap] = imgResize
             prediction , index = classifier.getPrediction(imgWhite, draw= False)
-            print(prediction, index)
+            if not args.headless:
+                print(prediction, index)
 
         else:
             k = imgSize / w
@@ -48,7 +75,11 @@ while True:
             imgWhite[hGap: hCal + hGap, :] = imgResize
             prediction , index = classifier.getPrediction(imgWhite, draw= False)
 
-       
+
+        if args.headless:
+            sink.emit({'frame': frame, 'label': labels[index], 'confidence': float(prediction[index])})
+            continue
+
         cv2.rectangle(imgOutput,(x-offset,y-offset-70),(x -offset+400, y - offset+60-50),(0,255,0),cv2.FILLED)  
 
         cv2.putText(imgOutput,labels[index],(x,y-30),cv2.FONT_HERSHEY_COMPLEX,2,(0,0,0),2) 
@@ -57,6 +88,10 @@ while True:
         cv2.imshow('ImageCrop', imgCrop)
         cv2.imshow('ImageWhite', imgWhite)
 
-    cv2.imshow('Image', imgOutput)
-    cv2.waitKey(1)
-    
+    if not args.headless:
+        cv2.imshow('Image', imgOutput)
+        cv2.waitKey(1)
+
+cap.release()
+if sink is not None:
+    sink.close()
@@ -0,0 +1,192 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is turned away instead of being queued"""
+    def __init__(self, status, message, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after  # Seconds the client should wait before retrying
+
+    def retry_after_header(self):
+        """Retry-After value in whole seconds"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class _Ticket:
+    def __init__(self, session_id, deadline):
+        self.session_id = session_id
+        self.deadline = deadline
+        self.superseded = False
+
+
+class AdmissionController:
+    """Bounded FIFO in front of the model with per-request deadlines
+
+    Requests are rejected up front when the queue is full or when the
+    estimated wait would make them miss their deadline. A newer frame from
+    the same session replaces an older one that is still waiting.
+    """
+    def __init__(self, max_concurrent=1, max_queue=8, default_deadline=1.5):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.default_deadline = default_deadline  # Seconds
+        self.service_time = 0.1  # Running estimate of seconds per request
+        self.smoothing = 0.2
+
+        self.cond = threading.Condition()
+        self.queue = deque()
+        self.waiting_sessions = {}
+        self.in_flight = 0
+
+    @contextmanager
+    def admit(self, session_id=None, budget=None):
+        """Wait for a slot, raising AdmissionRejected if the deadline cannot be met
+
+        budget is the time in seconds the caller is willing to wait for a
+        result, defaulting to default_deadline.
+        """
+        self._acquire(session_id, budget)
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - start_time)
+
+    def _estimated_wait(self, ahead):
+        """Seconds until a request with `ahead` requests in front of it starts"""
+        return ahead / self.max_concurrent * self.service_time
+
+    def _acquire(self, session_id, budget):
+        with self.cond:
+            ticket = self._enqueue(session_id, budget)
+            self.cond.notify_all()
+
+            try:
+                while True:
+                    remaining = self._poll(ticket)
+                    if remaining is None:
+                        return ticket
+                    self.cond.wait(remaining)
+            except BaseException:
+                self._abandon(ticket)
+                raise
+
+    def _enqueue(self, session_id, budget):
+        """Reject or queue a new request, must be called with the condition held"""
+        now = time.monotonic()
+        deadline = now + (budget if budget is not None else self.default_deadline)
+
+        ahead = len(self.queue) + self.in_flight
+        if session_id is not None and session_id in self.waiting_sessions:
+            ahead -= 1  # The stale frame it replaces no longer counts
+
+        if len(self.queue) >= self.max_queue and session_id not in self.waiting_sessions:
+            raise AdmissionRejected(503, "Server busy", self._estimated_wait(ahead))
+
+        if now + self._estimated_wait(ahead) + self.service_time > deadline:
+            raise AdmissionRejected(503, "Deadline cannot be met", self._estimated_wait(ahead))
+
+        ticket = _Ticket(session_id, deadline)
+
+        # Only the newest waiting frame of a session is kept
+        if session_id is not None:
+            stale = self.waiting_sessions.get(session_id)
+            if stale is not None:
+                stale.superseded = True
+                self.queue.remove(stale)
+            self.waiting_sessions[session_id] = ticket
+
+        self.queue.append(ticket)
+        return ticket
+
+    def _poll(self, ticket):
+        """Start the ticket if it is its turn, returning None, or the seconds left to wait
+
+        Must be called with the condition held.
+        """
+        if ticket.superseded:
+            raise AdmissionRejected(429, "Superseded by a newer frame", 0)
+
+        if self.queue[0] is ticket and self.in_flight < self.max_concurrent:
+            self.queue.popleft()
+            self._forget_session(ticket)
+            self.in_flight += 1
+            if self.queue and self.in_flight < self.max_concurrent:
+                # The next ticket may have polled before this one left the queue
+                self.cond.notify_all()
+            return None
+
+        remaining = ticket.deadline - self.service_time - time.monotonic()
+        if remaining <= 0:
+            self.queue.remove(ticket)
+            self._forget_session(ticket)
+            self.cond.notify_all()
+            raise AdmissionRejected(503, "Deadline exceeded while queued",
+                                    self._estimated_wait(len(self.queue) + self.in_flight))
+        return remaining
+
+    def _abandon(self, ticket):
+        """Drop a ticket that stopped waiting, must be called with the condition held"""
+        if ticket in self.queue:  # Rejected tickets have already left it
+            self.queue.remove(ticket)
+        self._forget_session(ticket)
+        self.cond.notify_all()
+
+    def _forget_session(self, ticket):
+        if ticket.session_id is not None and self.waiting_sessions.get(ticket.session_id) is ticket:
+            del self.waiting_sessions[ticket.session_id]
+
+    def _release(self, elapsed):
+        with self.cond:
+            self.in_flight -= 1
+            self.service_time += self.smoothing * (elapsed - self.service_time)
+            self.cond.notify_all()
+
+
+class AsyncAdmissionController(AdmissionController):
+    """AdmissionController for asyncio servers, waiting never blocks the event loop"""
+    def __init__(self, max_concurrent=1, max_queue=8, default_deadline=1.5):
+        super().__init__(max_concurrent, max_queue, default_deadline)
+        self.cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def admit(self, session_id=None, budget=None):
+        """Wait for a slot, raising AdmissionRejected if the deadline cannot be met"""
+        await self._acquire(session_id, budget)
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            await self._release(time.monotonic() - start_time)
+
+    async def _acquire(self, session_id, budget):
+        async with self.cond:
+            ticket = self._enqueue(session_id, budget)
+            self.cond.notify_all()
+
+            try:
+                while True:
+                    remaining = self._poll(ticket)
+                    if remaining is None:
+                        return ticket
+                    try:
+                        await asyncio.wait_for(self.cond.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                # Also covers a cancelled request, whose ticket would otherwise block the queue
+                self._abandon(ticket)
+                raise
+
+    async def _release(self, elapsed):
+        async with self.cond:
+            self.in_flight -= 1
+            self.service_time += self.smoothing * (elapsed - self.service_time)
+            self.cond.notify_all()
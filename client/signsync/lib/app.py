@@ -1,13 +1,20 @@
 from flask import Flask, jsonify, request
 from flask_mysqldb import MySQL
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
 import jwt as pyjwt
 import datetime
 import secrets
+import math
+import os
 from functools import wraps
 from model_handler import HandSignModel
+from cpu_profile import CpuProfile
+from profiling import SamplingProfiler, SlowRequestCapture
+from admission import AdmissionController, AdmissionRejected
+from compact import COMPACT_MIMETYPE, wants_compact, pack_result, gzip_body
+from auth_guard import RateLimiter, PasswordPool, check_rate_limits
 import threading
+import atexit
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -21,11 +28,55 @@ app.config['MYSQL_DB'] = 'db_signsync'
 # Secret key for JWT token encoding
 app.config['SECRET_KEY'] = secrets.token_hex(32)  
 
-# Initialize model handler
-model_handler = HandSignModel()
+# Password hashing runs in its own processes, forked before the model loads
+app.config['AUTH_WORKERS'] = int(os.environ.get('AUTH_WORKERS', 2))
+password_pool = PasswordPool(workers=app.config['AUTH_WORKERS'], max_pending=32)
+
+# Sign-in attempts per email and per client IP: burst, then tokens per second
+email_limiter = RateLimiter(rate=0.1, burst=5)
+ip_limiter = RateLimiter(rate=1.0, burst=20)
+
+# Session recording for replay.py, enabled by setting RECORD_DIR
+app.config['RECORD_DIR'] = os.environ.get('RECORD_DIR')
+app.config['RECORD_CROP_SIZE'] = int(os.environ.get('RECORD_CROP_SIZE', 0)) or None
+
+# Initialize model handler, thread counts come from CPU_PROFILE / CPU_* env vars
+model_handler = HandSignModel(
+    cpu_profile=CpuProfile.from_env(),
+    record_dir=app.config['RECORD_DIR'],
+    record_crop_size=app.config['RECORD_CROP_SIZE']
+)
+
+# Finish queued work and flush buffered recordings when the server exits
+atexit.register(model_handler.close)
+
+# Bounded queue in front of the model so latency stays within the client's deadline
+admission = AdmissionController(max_concurrent=model_handler.workers, max_queue=8, default_deadline=1.5)
+
+# Admin-only profiling (disabled unless ADMIN_TOKEN is set) and slow request capture
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'profiles')
+app.config['SLOW_REQUEST_DIR'] = os.environ.get('SLOW_REQUEST_DIR', 'slow_requests')
+app.config['SLOW_REQUEST_MS'] = int(os.environ.get('SLOW_REQUEST_MS', 1000))
+app.config['SLOW_REQUEST_MAX_MB'] = int(os.environ.get('SLOW_REQUEST_MAX_MB', 50))
+
+profiler = SamplingProfiler(app.config['PROFILE_DIR'])
+slow_requests = SlowRequestCapture(
+    app.config['SLOW_REQUEST_DIR'],
+    threshold=app.config['SLOW_REQUEST_MS'] / 1000,
+    max_bytes=app.config['SLOW_REQUEST_MAX_MB'] * 1024 * 1024,
+    ignore=(AdmissionRejected,)  # A rejected request says nothing about the pipeline
+)
 
 mysql = MySQL(app)
 
+@app.errorhandler(AdmissionRejected)
+def rejected_response(e):
+    """Answer a rate limited or shed request with its status and Retry-After"""
+    response = jsonify({'status': 'error', 'message': e.message, 'retry_after': e.retry_after})
+    response.headers['Retry-After'] = e.retry_after_header()
+    return response, e.status
+
 # JWT decorator
 def jwt_required(f):
     @wraps(f)
@@ -48,6 +99,20 @@ def jwt_required(f):
         return f(*args, **kwargs)
     return decorated
 
+# Admin token decorator
+def admin_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        admin_token = app.config['ADMIN_TOKEN']
+        if not admin_token:
+            return jsonify({'status': 'error', 'message': 'Admin endpoints are disabled'}), 403
+        
+        if not secrets.compare_digest(request.headers.get('X-Admin-Token', ''), admin_token):
+            return jsonify({'status': 'error', 'message': 'Admin token is invalid'}), 403
+        
+        return f(*args, **kwargs)
+    return decorated
+
 @app.route('/api/signup', methods=['POST'])
 def signup():
     try:
@@ -62,6 +127,8 @@ def signup():
         if not full_name or not email or not raw_password:
             return jsonify({'status': 'error', 'message': 'Missing fields'}), 400
 
+        check_rate_limits((ip_limiter, request.remote_addr))
+
         # Check if email exists
         cur = mysql.connection.cursor()
         cur.execute("SELECT email FROM users WHERE email = %s", (email,))
@@ -70,7 +137,7 @@ def signup():
             return jsonify({'status': 'error', 'message': 'Email already exists'}), 400
 
         # Hash password
-        password = generate_password_hash(raw_password)
+        password = password_pool.hash(raw_password)
 
         # Insert into database
         cur.execute(
@@ -82,6 +149,8 @@ def signup():
 
         return jsonify({'status': 'success', 'message': 'User registered successfully'})
 
+    except AdmissionRejected:
+        raise  # Answered by rejected_response
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
@@ -95,12 +164,18 @@ def login():
         if not email or not password:
             return jsonify({'status': 'error', 'message': 'Missing email or password'}), 400
 
+        if not isinstance(email, str) or not isinstance(password, str):
+            return jsonify({'status': 'error', 'message': 'Email and password must be strings'}), 400
+
+        check_rate_limits((ip_limiter, request.remote_addr), (email_limiter, email.strip().lower()))
+
         cur = mysql.connection.cursor()
         cur.execute("SELECT user_id, password, full_name, is_pro FROM users WHERE email = %s", (email,))
         user = cur.fetchone()
         cur.close()
 
-        if user and check_password_hash(user[1], password):
+        # Identical attempts in flight share one hash check
+        if user and password_pool.check(user[1], password):
             token = pyjwt.encode({
                 'user_id': user[0],
                 'exp': datetime.datetime.utcnow() + datetime.timedelta(days=30)
@@ -115,6 +190,8 @@ def login():
         else:
             return jsonify({'status': 'error', 'message': 'Invalid credentials'}), 401
 
+    except AdmissionRejected:
+        raise  # Answered by rejected_response
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
@@ -147,31 +224,112 @@ def get_profile():
 def translate():
     data = request.get_json()
     
-    if not data or 'image' not in data:
+    if not data or ('image' not in data and 'crop' not in data):
         return jsonify({'status': 'error', 'message': 'Missing image data'}), 400
     
+    top_k = data.get('top_k')
+    if top_k is not None and (not isinstance(top_k, int) or top_k < 1):
+        return jsonify({'status': 'error', 'message': 'top_k must be a positive integer'}), 400
+    
+    budget = request.headers.get('X-Deadline-Ms')
+    try:
+        budget = float(budget) / 1000 if budget is not None else None
+    except ValueError:
+        budget = math.nan
+    if budget is not None and not (math.isfinite(budget) and budget > 0):
+        return jsonify({'status': 'error', 'message': 'X-Deadline-Ms must be a positive number'}), 400
+    
+    session_id = data.get('session_id') or request.headers.get('X-Session-Id')
+    if session_id is not None and not isinstance(session_id, str):
+        return jsonify({'status': 'error', 'message': 'session_id must be a string'}), 400
+    
     try:
-        result = model_handler.process_image(data['image'])
+        with slow_requests.track(data.get('image') or data.get('crop')) as capture:
+            with admission.admit(session_id, budget):
+                if 'crop' in data:
+                    # The client already located the hand, skip detection
+                    result = model_handler.process_crop(data['crop'], hands=data.get('hands'), top_k=top_k)
+                else:
+                    # Frames from the same session are searched around the last hand
+                    result = model_handler.process_image(data['image'], top_k=top_k, session_id=session_id)
+            capture['timings'] = result.get('timings')
+            capture['result'] = result.get('error') or result.get('label')
         
         if 'error' in result:
             return jsonify({'status': 'error', 'message': result['error']}), 400
+        
+        if wants_compact(request.accept_mimetypes):
+            # Label index and confidence only, resolved against the cached /api/labels table
+            response = app.response_class(pack_result(result, model_handler.label_registry), mimetype=COMPACT_MIMETYPE)
+        elif top_k:
+            # Return the ranked labels so the client can apply its own threshold
+            response = jsonify({
+                'status': 'success',
+                'translated_text': result.get('label', 'No translation available'),
+                'confidence': result['confidence'],
+                'top_k': result['top_k'],
+                'timings': result['timings']
+            })
+        else:
+            # Only return the translated_text
+            response = jsonify({
+                'status': 'success',
+                'translated_text': result.get('label', 'No translation available') # Ensure it fetches 'label'
+            })
  
-        # Only return the translated_text
-        return jsonify({
-            'status': 'success',
-            'translated_text': result.get('label', 'No translation available') # Ensure it fetches 'label'
-        }), 200
+        # The body format follows the Accept header, caches must key on it
+        response.vary.add('Accept')
+        return response, 200
+    except AdmissionRejected:
+        raise  # Answered by rejected_response
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/api/labels', methods=['GET'])
 def get_labels():
     try:
-        labels = model_handler.get_labels()
-        return jsonify({'status': 'success', 'data': labels}), 200
+        registry = model_handler.label_registry
+        
+        # The label table only changes with the model, let clients cache it
+        if request.if_none_match.contains_weak(registry.version):
+            response = app.response_class(status=304)
+        else:
+            response = jsonify({'status': 'success', 'data': registry.names, 'version': registry.version})
+        response.set_etag(registry.version)
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+        return response
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.after_request
+def compress_response(response):
+    if response.direct_passthrough or response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    
+    body = gzip_body(response.get_data(), request.headers.get('Accept-Encoding', ''))
+    if body is not None:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        # The gzipped bytes differ from the identity encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+    return response
+
+@app.route('/api/admin/profile', methods=['POST'])
+@admin_required
+def start_profile():
+    data = request.get_json(silent=True) or {}
+    seconds = data.get('seconds', 10)
+    if not isinstance(seconds, (int, float)) or not 0 < seconds <= 300:
+        return jsonify({'status': 'error', 'message': 'seconds must be between 0 and 300'}), 400
+    
+    path = profiler.start(seconds)
+    if path is None:
+        return jsonify({'status': 'error', 'message': 'Profiler is already running'}), 409
+    return jsonify({'status': 'success', 'file': path, 'seconds': seconds}), 202
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'success', 'message': 'API is healthy'}), 200
@@ -0,0 +1,374 @@
+"""ASGI variant of app.py for many concurrent streaming clients.
+
+Run with: hypercorn asgi_app:app --bind 0.0.0.0:5000
+
+Requests are handled on the event loop instead of one OS thread each. The
+model runs through HandSignModel's worker pool and batcher, and MySQL is
+accessed through an aiomysql connection pool.
+"""
+from quart import Quart, jsonify, request, g
+from quart_cors import cors
+import aiomysql
+import jwt as pyjwt
+import datetime
+import secrets
+import math
+import os
+from functools import wraps
+from model_handler import HandSignModel
+from cpu_profile import CpuProfile
+from profiling import SamplingProfiler, SlowRequestCapture
+from admission import AsyncAdmissionController, AdmissionRejected
+from compact import COMPACT_MIMETYPE, wants_compact, pack_result, gzip_body
+from auth_guard import RateLimiter, PasswordPool, check_rate_limits
+
+app = Quart(__name__)
+app = cors(app)  # Enable CORS for all routes
+
+# MySQL Configuration
+app.config['MYSQL_HOST'] = 'localhost'
+app.config['MYSQL_USER'] = 'root'
+app.config['MYSQL_PASSWORD'] = 'makaveli'
+app.config['MYSQL_DB'] = 'db_signsync'
+app.config['MYSQL_POOL_SIZE'] = 20
+
+# Secret key for JWT token encoding
+app.config['SECRET_KEY'] = secrets.token_hex(32)
+
+# Password hashing runs in its own processes, forked before the model loads
+app.config['AUTH_WORKERS'] = int(os.environ.get('AUTH_WORKERS', 2))
+password_pool = PasswordPool(workers=app.config['AUTH_WORKERS'], max_pending=32)
+
+# Sign-in attempts per email and per client IP: burst, then tokens per second
+email_limiter = RateLimiter(rate=0.1, burst=5)
+ip_limiter = RateLimiter(rate=1.0, burst=20)
+
+# Session recording for replay.py, enabled by setting RECORD_DIR
+app.config['RECORD_DIR'] = os.environ.get('RECORD_DIR')
+app.config['RECORD_CROP_SIZE'] = int(os.environ.get('RECORD_CROP_SIZE', 0)) or None
+
+# Initialize model handler, thread counts come from CPU_PROFILE / CPU_* env vars
+model_handler = HandSignModel(
+    cpu_profile=CpuProfile.from_env(),
+    record_dir=app.config['RECORD_DIR'],
+    record_crop_size=app.config['RECORD_CROP_SIZE']
+)
+
+# Bounded queue in front of the model so latency stays within the client's deadline
+admission = AsyncAdmissionController(max_concurrent=model_handler.workers, max_queue=8, default_deadline=1.5)
+
+# Admin-only profiling (disabled unless ADMIN_TOKEN is set) and slow request capture
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'profiles')
+app.config['SLOW_REQUEST_DIR'] = os.environ.get('SLOW_REQUEST_DIR', 'slow_requests')
+app.config['SLOW_REQUEST_MS'] = int(os.environ.get('SLOW_REQUEST_MS', 1000))
+app.config['SLOW_REQUEST_MAX_MB'] = int(os.environ.get('SLOW_REQUEST_MAX_MB', 50))
+
+profiler = SamplingProfiler(app.config['PROFILE_DIR'])
+slow_requests = SlowRequestCapture(
+    app.config['SLOW_REQUEST_DIR'],
+    threshold=app.config['SLOW_REQUEST_MS'] / 1000,
+    max_bytes=app.config['SLOW_REQUEST_MAX_MB'] * 1024 * 1024,
+    ignore=(AdmissionRejected,)  # A rejected request says nothing about the pipeline
+)
+
+db_pool = None
+
+
+@app.before_serving
+async def create_db_pool():
+    global db_pool
+    db_pool = await aiomysql.create_pool(
+        host=app.config['MYSQL_HOST'],
+        user=app.config['MYSQL_USER'],
+        password=app.config['MYSQL_PASSWORD'],
+        db=app.config['MYSQL_DB'],
+        maxsize=app.config['MYSQL_POOL_SIZE'],
+        autocommit=True  # Reads see committed rows and don't hold a transaction open in the pool
+    )
+
+
+@app.after_serving
+async def close_db_pool():
+    db_pool.close()
+    await db_pool.wait_closed()
+    model_handler.close()
+
+
+@app.errorhandler(AdmissionRejected)
+async def rejected_response(e):
+    """Answer a rate limited or shed request with its status and Retry-After"""
+    response = jsonify({'status': 'error', 'message': e.message, 'retry_after': e.retry_after})
+    response.headers['Retry-After'] = e.retry_after_header()
+    return response, e.status
+
+
+# JWT decorator
+def jwt_required(f):
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        token = None
+        if 'Authorization' in request.headers:
+            token = request.headers['Authorization'].split(" ")[1]
+
+        if not token:
+            return jsonify({'status': 'error', 'message': 'Token is missing'}), 401
+
+        try:
+            data = pyjwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            g.user_id = data['user_id']
+        except pyjwt.ExpiredSignatureError:
+            return jsonify({'status': 'error', 'message': 'Token has expired'}), 401
+        except Exception as e:
+            return jsonify({'status': 'error', 'message': 'Token is invalid'}), 401
+
+        return await f(*args, **kwargs)
+    return decorated
+
+
+# Admin token decorator
+def admin_required(f):
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        admin_token = app.config['ADMIN_TOKEN']
+        if not admin_token:
+            return jsonify({'status': 'error', 'message': 'Admin endpoints are disabled'}), 403
+
+        if not secrets.compare_digest(request.headers.get('X-Admin-Token', ''), admin_token):
+            return jsonify({'status': 'error', 'message': 'Admin token is invalid'}), 403
+
+        return await f(*args, **kwargs)
+    return decorated
+
+
+@app.route('/api/signup', methods=['POST'])
+async def signup():
+    try:
+        data = await request.get_json()
+
+        full_name = data.get('full_name')
+        email = data.get('email')
+        raw_password = data.get('password')
+        is_pro = data.get('is_pro', 0)
+
+        # Validate inputs
+        if not full_name or not email or not raw_password:
+            return jsonify({'status': 'error', 'message': 'Missing fields'}), 400
+
+        check_rate_limits((ip_limiter, request.remote_addr))
+
+        async with db_pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                # Check if email exists
+                await cur.execute("SELECT email FROM users WHERE email = %s", (email,))
+                if await cur.fetchone():
+                    return jsonify({'status': 'error', 'message': 'Email already exists'}), 400
+
+        # Hash password in the password pool, off the event loop, without holding a pooled connection
+        password = await password_pool.hash_async(raw_password)
+
+        async with db_pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                # Insert into database
+                await cur.execute(
+                    "INSERT INTO users (full_name, email, password, is_pro) VALUES (%s, %s, %s, %s)",
+                    (full_name, email, password, is_pro)
+                )
+            await conn.commit()
+
+        return jsonify({'status': 'success', 'message': 'User registered successfully'})
+
+    except AdmissionRejected:
+        raise  # Answered by rejected_response
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/login', methods=['POST'])
+async def login():
+    try:
+        data = await request.get_json()
+        email = data.get('email')
+        password = data.get('password')
+
+        if not email or not password:
+            return jsonify({'status': 'error', 'message': 'Missing email or password'}), 400
+
+        if not isinstance(email, str) or not isinstance(password, str):
+            return jsonify({'status': 'error', 'message': 'Email and password must be strings'}), 400
+
+        check_rate_limits((ip_limiter, request.remote_addr), (email_limiter, email.strip().lower()))
+
+        async with db_pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT user_id, password, full_name, is_pro FROM users WHERE email = %s", (email,))
+                user = await cur.fetchone()
+
+        # Check the password hash in the password pool; identical attempts in flight share one check
+        if user and await password_pool.check_async(user[1], password):
+            token = pyjwt.encode({
+                'user_id': user[0],
+                'exp': datetime.datetime.utcnow() + datetime.timedelta(days=30)
+            }, app.config['SECRET_KEY'], algorithm='HS256')
+
+            return jsonify({
+                'status': 'success',
+                'token': token,
+                'userName': user[2],
+                'isPro': bool(user[3])
+            })
+        else:
+            return jsonify({'status': 'error', 'message': 'Invalid credentials'}), 401
+
+    except AdmissionRejected:
+        raise  # Answered by rejected_response
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/profile', methods=['GET'])
+@jwt_required
+async def get_profile():
+    try:
+        async with db_pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT full_name, email, is_pro FROM users WHERE user_id = %s", (g.user_id,))
+                row = await cur.fetchone()
+
+        if row:
+            return jsonify({
+                'status': 'success',
+                'data': {
+                    'name': row[0],
+                    'email': row[1],
+                    'isPro': bool(row[2])
+                }
+            })
+        else:
+            return jsonify({'status': 'error', 'message': 'User not found'}), 404
+
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/translate', methods=['POST'])
+async def translate():
+    data = await request.get_json()
+
+    if not data or ('image' not in data and 'crop' not in data):
+        return jsonify({'status': 'error', 'message': 'Missing image data'}), 400
+
+    top_k = data.get('top_k')
+    if top_k is not None and (not isinstance(top_k, int) or top_k < 1):
+        return jsonify({'status': 'error', 'message': 'top_k must be a positive integer'}), 400
+
+    budget = request.headers.get('X-Deadline-Ms')
+    try:
+        budget = float(budget) / 1000 if budget is not None else None
+    except ValueError:
+        budget = math.nan
+    if budget is not None and not (math.isfinite(budget) and budget > 0):
+        return jsonify({'status': 'error', 'message': 'X-Deadline-Ms must be a positive number'}), 400
+
+    session_id = data.get('session_id') or request.headers.get('X-Session-Id')
+    if session_id is not None and not isinstance(session_id, str):
+        return jsonify({'status': 'error', 'message': 'session_id must be a string'}), 400
+
+    try:
+        with slow_requests.track(data.get('image') or data.get('crop')) as capture:
+            async with admission.admit(session_id, budget):
+                if 'crop' in data:
+                    # The client already located the hand, skip detection
+                    result = await model_handler.process_crop_async(data['crop'], hands=data.get('hands'), top_k=top_k)
+                else:
+                    # Frames from the same session are searched around the last hand
+                    result = await model_handler.process_image_async(data['image'], top_k=top_k, session_id=session_id)
+            capture['timings'] = result.get('timings')
+            capture['result'] = result.get('error') or result.get('label')
+
+        if 'error' in result:
+            return jsonify({'status': 'error', 'message': result['error']}), 400
+
+        if wants_compact(request.accept_mimetypes):
+            # Label index and confidence only, resolved against the cached /api/labels table
+            response = app.response_class(pack_result(result, model_handler.label_registry), mimetype=COMPACT_MIMETYPE)
+        elif top_k:
+            # Return the ranked labels so the client can apply its own threshold
+            response = jsonify({
+                'status': 'success',
+                'translated_text': result.get('label', 'No translation available'),
+                'confidence': result['confidence'],
+                'top_k': result['top_k'],
+                'timings': result['timings']
+            })
+        else:
+            # Only return the translated_text
+            response = jsonify({
+                'status': 'success',
+                'translated_text': result.get('label', 'No translation available')
+            })
+
+        # The body format follows the Accept header, caches must key on it
+        response.vary.add('Accept')
+        return response, 200
+    except AdmissionRejected:
+        raise  # Answered by rejected_response
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/labels', methods=['GET'])
+async def get_labels():
+    try:
+        registry = model_handler.label_registry
+
+        # The label table only changes with the model, let clients cache it
+        if request.if_none_match.contains_weak(registry.version):
+            response = app.response_class('', status=304)
+        else:
+            response = jsonify({'status': 'success', 'data': registry.names, 'version': registry.version})
+        response.set_etag(registry.version)
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+        return response
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.after_request
+async def compress_response(response):
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+
+    body = gzip_body(await response.get_data(), request.headers.get('Accept-Encoding', ''))
+    if body is not None:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        # The gzipped bytes differ from the identity encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+    return response
+
+
+@app.route('/api/admin/profile', methods=['POST'])
+@admin_required
+async def start_profile():
+    data = await request.get_json(silent=True) or {}
+    seconds = data.get('seconds', 10)
+    if not isinstance(seconds, (int, float)) or not 0 < seconds <= 300:
+        return jsonify({'status': 'error', 'message': 'seconds must be between 0 and 300'}), 400
+
+    path = profiler.start(seconds)
+    if path is None:
+        return jsonify({'status': 'error', 'message': 'Profiler is already running'}), 409
+    return jsonify({'status': 'success', 'file': path, 'seconds': seconds}), 202
+
+
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    return jsonify({'status': 'success', 'message': 'API is healthy'}), 200
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000)
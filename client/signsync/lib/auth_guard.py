@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from admission import AdmissionRejected
+
+
+class RateLimiter:
+    """In-memory token buckets, one per key
+
+    Each key may spend `burst` attempts at once and earns `rate` attempts
+    back per second. Idle buckets are dropped once more than max_keys are
+    tracked.
+    """
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate  # Tokens per second
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets = {}  # key -> [tokens, last update]
+        self.lock = threading.Lock()
+
+    def acquire(self, key):
+        """Take a token for key, returning 0 if allowed or the seconds until one is available"""
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self.buckets[key] = [float(self.burst), now]
+
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0.0
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate
+
+    def _prune(self, now):
+        # Buckets that have refilled behave exactly like new ones
+        full = [key for key, (tokens, last) in self.buckets.items()
+                if tokens + (now - last) * self.rate >= self.burst]
+        for key in full:
+            del self.buckets[key]
+
+        # Still too many: drop the least recently used half
+        if len(self.buckets) >= self.max_keys:
+            stale = sorted(self.buckets, key=lambda key: self.buckets[key][1])
+            for key in stale[:len(stale) // 2]:
+                del self.buckets[key]
+
+
+def check_rate_limits(*limits):
+    """
+    Take a token from each (limiter, key) pair, raising AdmissionRejected (429) if any is empty
+
+    Keys that are None are skipped.
+    """
+    for limiter, key in limits:
+        if key is None:
+            continue
+        wait = limiter.acquire(key)
+        if wait > 0:
+            raise AdmissionRejected(429, "Too many attempts, try again later", wait)
+
+
+def _start_worker():
+    return None
+
+
+class PasswordPool:
+    """Password hashing on a bounded pool of worker processes
+
+    The KDF is slow on purpose. Running it in separate processes keeps it
+    off the request threads and out of the GIL the model pipeline needs.
+    At most max_pending hashes are queued, later requests get a 503.
+    Concurrent checks of the same hash and password share one computation.
+    """
+    def __init__(self, workers=2, max_pending=32):
+        # Fork before the model starts its threads; spawn would re-import the app in every worker
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self.max_pending = max_pending
+        self.pending = 0
+        self.checks = {}  # Key of an in-flight check -> its future
+        self.lock = threading.Lock()
+
+        # Start the workers now, a forked pool starts all of them on the first submit
+        self.executor.submit(_start_worker).result()
+
+    def _submit(self, fn, *args):
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise AdmissionRejected(503, "Too many sign-ins in progress", 1.0)
+            self.pending += 1
+
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self.lock:
+            self.pending -= 1
+
+    def submit_hash(self, password):
+        """Future of generate_password_hash(password)"""
+        return self._submit(generate_password_hash, password)
+
+    def submit_check(self, pwhash, password):
+        """Future of check_password_hash(pwhash, password), shared with identical checks in flight"""
+        key = hashlib.sha256(f"{pwhash}\0{password}".encode('utf-8')).hexdigest()
+        with self.lock:
+            future = self.checks.get(key)
+            if future is not None:
+                return future
+
+        future = self._submit(check_password_hash, pwhash, password)
+        with self.lock:
+            # Another thread may have started the same check meanwhile, either result is right
+            self.checks.setdefault(key, future)
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def _forget(self, key, future):
+        with self.lock:
+            if self.checks.get(key) is future:
+                del self.checks[key]
+
+    def hash(self, password):
+        return self.submit_hash(password).result()
+
+    def check(self, pwhash, password):
+        return self.submit_check(pwhash, password).result()
+
+    async def hash_async(self, password):
+        return await asyncio.wrap_future(self.submit_hash(password))
+
+    async def check_async(self, pwhash, password):
+        return await asyncio.wrap_future(self.submit_check(pwhash, password))
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
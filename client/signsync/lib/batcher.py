@@ -0,0 +1,64 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class InferenceBatcher:
+    """Collects crops from concurrent requests into single model calls
+
+    A dedicated thread owns the model. Callers submit a list of crops and get
+    a Future that resolves to the prediction rows for those crops.
+    """
+    def __init__(self, predict_fn, max_batch=16, max_wait=0.005):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait  # Seconds to wait for more requests to join a batch
+        self.queue = queue.Queue()
+
+        self.thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, crops):
+        """Queue crops for the next batch and return a Future of their predictions"""
+        future = Future()
+        self.queue.put((crops, future))
+        return future
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or max_wait passes"""
+        items = [self.queue.get()]
+        count = len(items[0][0])
+        deadline = time.monotonic() + self.max_wait
+
+        while count < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            count += len(item[0])
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            batch = np.stack([crop for crops, _ in items for crop in crops])
+
+            try:
+                prediction = self.predict_fn(batch)
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            # Hand each request back its own rows
+            start = 0
+            for crops, future in items:
+                future.set_result(prediction[start:start + len(crops)])
+                start += len(crops)
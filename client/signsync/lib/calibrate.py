@@ -0,0 +1,145 @@
+import argparse
+
+import cv2
+import numpy as np
+import tensorflow as tf
+from scipy.optimize import minimize_scalar
+
+from data_folders import list_samples
+from labels import LabelRegistry
+from model_handler import temperature_scale
+
+
+def load_dataset(data_dir, labels, img_size):
+    """
+    Load the saved hand crops from the Data folders
+
+    Each sub-folder of data_dir is named after a label. Folders that do not
+    match a model label are skipped.
+
+    Args:
+        data_dir (str): Folder containing one sub-folder per label
+        labels (LabelRegistry): Model labels
+        img_size (int): Model input size
+
+    Returns:
+        tuple: (images, targets) as numpy arrays
+    """
+    images = []
+    targets = []
+
+    for label, path in list_samples(data_dir, labels):
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        img = cv2.resize(img, (img_size, img_size))
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        images.append(img.astype('float32') / 255.0)
+        targets.append(labels.index(label))
+
+    return np.array(images), np.array(targets)
+
+
+def negative_log_likelihood(prediction, targets, temperature):
+    """
+    Mean negative log likelihood of the targets after temperature scaling
+
+    Args:
+        prediction (numpy.ndarray): Softmax outputs of the model
+        targets (numpy.ndarray): Label indexes
+        temperature (float): Temperature to evaluate
+
+    Returns:
+        float: Mean negative log likelihood
+    """
+    scaled = temperature_scale(prediction, temperature)
+    return float(-np.mean(np.log(np.clip(scaled[np.arange(len(targets)), targets], 1e-12, 1.0))))
+
+
+def split_holdout(targets, fraction, seed=0):
+    """
+    Split sample indexes into a fitting and a held-out set, per label
+
+    Labels with a single sample only go to the fitting set.
+
+    Args:
+        targets (numpy.ndarray): Label indexes
+        fraction (float): Share of each label held out
+        seed (int): Shuffle seed
+
+    Returns:
+        tuple: (fit indexes, held-out indexes) as numpy arrays
+    """
+    rng = np.random.default_rng(seed)
+    fit = []
+    holdout = []
+    for label in np.unique(targets):
+        indexes = rng.permutation(np.flatnonzero(targets == label))
+        # At least one of each label on both sides when it has two or more samples
+        held = min(max(int(round(len(indexes) * fraction)), 1), len(indexes) - 1)
+        holdout.extend(indexes[:held])
+        fit.extend(indexes[held:])
+    return np.array(fit, dtype=int), np.array(holdout, dtype=int)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit a softmax temperature on the labelled Data folders")
+    parser.add_argument("--data", default="backendv2/Data", help="Folder with one sub-folder per label")
+    parser.add_argument("--model", default="Model/keras_model.h5")
+    parser.add_argument("--labels", default="Model/labels.txt")
+    parser.add_argument("--output", default="Model/temperature.txt")
+    parser.add_argument("--img-size", type=int, default=224)
+    parser.add_argument("--min-samples", type=int, default=200, help="Fewer labelled images are refused")
+    parser.add_argument("--min-classes", type=int, default=5, help="Fewer labels with images are refused")
+    parser.add_argument("--holdout", type=float, default=0.3, help="Share of each label held out of the fit")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    labels = LabelRegistry.load(args.labels)
+    images, targets = load_dataset(args.data, labels, args.img_size)
+
+    classes = len(np.unique(targets))
+    if len(images) < args.min_samples or classes < args.min_classes:
+        # A handful of images is separated perfectly, and the fit runs to the lowest temperature
+        print(f"Only {len(images)} images over {classes} labels, need at least "
+              f"{args.min_samples} over {args.min_classes}. Exiting.")
+        return
+
+    fit, holdout = split_holdout(targets, args.holdout, args.seed)
+
+    model = tf.keras.models.load_model(
+        args.model,
+        compile=False,
+        custom_objects={'DepthwiseConv2D': tf.keras.layers.DepthwiseConv2D}
+    )
+    prediction = model.predict(images)
+
+    bounds = (0.05, 20.0)
+    result = minimize_scalar(
+        lambda t: negative_log_likelihood(prediction[fit], targets[fit], t),
+        bounds=bounds,
+        method='bounded'
+    )
+    temperature = float(result.x)
+    before = negative_log_likelihood(prediction[holdout], targets[holdout], 1.0)
+    after = negative_log_likelihood(prediction[holdout], targets[holdout], temperature)
+
+    print(f"Images: {len(fit)} fit, {len(holdout)} held out, {classes} labels")
+    print(f"Held-out NLL before: {before:.4f}")
+    print(f"Held-out NLL after:  {after:.4f}")
+    print(f"Temperature: {temperature:.4f}")
+
+    if min(abs(temperature - bound) for bound in bounds) < 1e-3 * bounds[1]:
+        print(f"Temperature hit the search bound {bounds}, not saving. The data does not constrain it.")
+        return
+    if after >= before:
+        print("Temperature does not improve the held-out NLL, not saving.")
+        return
+
+    with open(args.output, 'w') as file:
+        file.write(f"{temperature}\n")
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import gzip
+import struct
+
+COMPACT_MIMETYPE = 'application/vnd.signsync.label'
+
+# status, label index, confidence * 65535, label table version
+HEADER = struct.Struct('<BhH8s')
+STATUS_INDEXED = 0  # Label is the index into the table of that version
+STATUS_NAMED = 1  # Label is not in the table (a dynamic sign), its UTF-8 name follows
+
+MIN_GZIP_BYTES = 200  # Below this gzip saves less than its extra headers cost
+
+
+def wants_compact(accept_mimetypes):
+    """Whether the client's Accept header prefers the compact body over JSON"""
+    return accept_mimetypes.best_match(['application/json', COMPACT_MIMETYPE]) == COMPACT_MIMETYPE
+
+
+def pack_result(result, registry):
+    """
+    Encode a translation as a 13 byte body, plus the name for labels outside the table
+
+    Args:
+        result (dict): Result from HandSignModel
+        registry (LabelRegistry): Label table the index refers to
+
+    Returns:
+        bytes: Compact body
+    """
+    label = result.get('label')
+    confidence = int(round(min(max(result.get('confidence', 0.0), 0.0), 1.0) * 65535))
+    version = bytes.fromhex(registry.version)
+
+    if label in registry:
+        return HEADER.pack(STATUS_INDEXED, registry.index(label), confidence, version)
+    return HEADER.pack(STATUS_NAMED, -1, confidence, version) + label.encode('utf-8')
+
+
+def unpack_result(body, labels=None):
+    """
+    Decode a compact body
+
+    Args:
+        body (bytes): Body from pack_result
+        labels (list): Cached label table, used to resolve the index
+
+    Returns:
+        dict: index, confidence, version (hex, compare with the cached table)
+            and label when it can be resolved
+    """
+    status, index, confidence, version = HEADER.unpack_from(body)
+    result = {'index': index, 'confidence': confidence / 65535, 'version': version.hex()}
+
+    if status == STATUS_NAMED:
+        result['label'] = body[HEADER.size:].decode('utf-8')
+    elif labels is not None and 0 <= index < len(labels):
+        result['label'] = labels[index]
+    return result
+
+
+def gzip_body(body, accept_encoding):
+    """Gzipped body if the client accepts gzip and the body is large enough to shrink, else None"""
+    if len(body) < MIN_GZIP_BYTES or 'gzip' not in accept_encoding.lower():
+        return None
+    return gzip.compress(body, compresslevel=6)
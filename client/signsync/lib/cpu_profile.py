@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+
+import cv2
+
+
+class CpuProfile:
+    """Thread pool sizes and core pinning for CPU inference
+
+    TensorFlow, OpenCV and the hand worker pool each start their own
+    threads. Left at their defaults they oversubscribe the cores. None
+    leaves a library at its default.
+
+    MediaPipe has no thread setting of its own. Each worker thread runs one
+    MediaPipe graph, so its share of the CPU is set by `workers` and by
+    pinning the workers with `worker_cpus`. The rest of the process,
+    including TensorFlow's pools, then runs on the remaining cores.
+    """
+    FIELDS = ('tf_intra_op_threads', 'tf_inter_op_threads', 'cv2_threads', 'workers', 'worker_cpus')
+
+    def __init__(self, tf_intra_op_threads=None, tf_inter_op_threads=None, cv2_threads=None,
+                 workers=4, worker_cpus=None):
+        self.tf_intra_op_threads = tf_intra_op_threads
+        self.tf_inter_op_threads = tf_inter_op_threads
+        self.cv2_threads = cv2_threads
+        self.workers = workers
+        self.worker_cpus = worker_cpus  # CPU ids the workers are pinned to round-robin
+        self.next_cpu = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path):
+        """Profile from a JSON file, as written by cpu_profile_bench.py"""
+        with open(path, 'r') as f:
+            return cls(**{key: value for key, value in json.load(f).items() if key in cls.FIELDS})
+
+    @classmethod
+    def from_env(cls):
+        """Profile from CPU_PROFILE (a JSON file), then individual CPU_* overrides"""
+        profile = cls.from_file(os.environ['CPU_PROFILE']) if os.environ.get('CPU_PROFILE') else cls()
+
+        for field in ('tf_intra_op_threads', 'tf_inter_op_threads', 'cv2_threads', 'workers'):
+            value = os.environ.get(f"CPU_{field.upper()}")
+            if value:
+                setattr(profile, field, int(value))
+
+        cpus = os.environ.get('CPU_WORKER_CPUS')
+        if cpus:
+            profile.worker_cpus = [int(cpu) for cpu in cpus.split(',')]
+        return profile
+
+    def apply(self):
+        """Configure TensorFlow and OpenCV, must run before the model is loaded"""
+        import tensorflow as tf
+
+        if self.worker_cpus and hasattr(os, 'sched_setaffinity'):
+            # Threads started from here on, TensorFlow's pools included, inherit this set
+            rest = os.sched_getaffinity(0) - set(self.worker_cpus)
+            if rest:
+                os.sched_setaffinity(0, rest)
+
+        if self.tf_intra_op_threads is not None:
+            tf.config.threading.set_intra_op_parallelism_threads(self.tf_intra_op_threads)
+        if self.tf_inter_op_threads is not None:
+            tf.config.threading.set_inter_op_parallelism_threads(self.tf_inter_op_threads)
+        if self.cv2_threads is not None:
+            cv2.setNumThreads(self.cv2_threads)
+
+    def pin_worker(self):
+        """Pin the calling worker thread to the next CPU in worker_cpus (Linux only)"""
+        # OpenMP builds of OpenCV keep the thread count per calling thread
+        if self.cv2_threads is not None:
+            cv2.setNumThreads(self.cv2_threads)
+
+        if not self.worker_cpus or not hasattr(os, 'sched_setaffinity'):
+            return
+
+        with self.lock:
+            cpu = self.worker_cpus[self.next_cpu % len(self.worker_cpus)]
+            self.next_cpu += 1
+        os.sched_setaffinity(threading.get_native_id(), {cpu})
@@ -0,0 +1,116 @@
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def run_one(profile_dict, data_dir, requests, crop):
+    """
+    Benchmark a single profile in this process
+
+    TensorFlow thread pools can only be configured once per process, so the
+    sweep runs every profile in a fresh child.
+
+    Returns:
+        dict: throughput in req/s and sequential p50/p99 latency in ms
+    """
+    from cpu_profile import CpuProfile
+    from model_handler import HandSignModel
+    from throughput_bench import load_images, measure
+
+    images = load_images(data_dir, requests)
+    model = HandSignModel(cpu_profile=CpuProfile(**profile_dict))
+    submit = model.submit_crop if crop else model.submit_image
+
+    measure(model, images, model.workers * 2, crop)  # Warm up
+    throughput = measure(model, images, requests, crop)
+
+    latencies = []
+    for image in images[:min(len(images), 100)]:
+        start_time = time.time()
+        submit(image).result()
+        latencies.append(time.time() - start_time)
+
+    model.close()
+    return {
+        'throughput': throughput,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000)
+    }
+
+
+def parse_values(text):
+    """'1,2,default' -> [1, 2, None]"""
+    return [None if value == 'default' else int(value) for value in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep CPU thread settings and report the best profile")
+    parser.add_argument("--data", default="backendv2/Data")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--crop", action="store_true", help="Benchmark the client crop path")
+    parser.add_argument("--intra", default="1,2,4,default", help="TF intra-op thread counts")
+    parser.add_argument("--inter", default="1,2,default", help="TF inter-op thread counts")
+    parser.add_argument("--cv2", default="1,default", help="OpenCV thread counts")
+    parser.add_argument("--workers", default="1,2,4", help="Hand worker counts")
+    parser.add_argument("--pin", action="store_true", help="Also try pinning workers to their own cores")
+    parser.add_argument("--objective", choices=["throughput", "latency"], default="throughput")
+    parser.add_argument("--output", default="cpu_profile.json", help="Where to write the best profile")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(json.loads(args.run_one), args.data, args.requests, args.crop)))
+        return
+
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count()))
+
+    profiles = []
+    for intra, inter, cv2_threads, workers in itertools.product(
+            parse_values(args.intra), parse_values(args.inter), parse_values(args.cv2), parse_values(args.workers)):
+        profile = {'tf_intra_op_threads': intra, 'tf_inter_op_threads': inter,
+                   'cv2_threads': cv2_threads, 'workers': workers or 4, 'worker_cpus': None}
+        profiles.append(profile)
+        if args.pin and profile['workers'] < len(cpus):
+            # Workers get the first cores to themselves, TensorFlow's pools keep the rest
+            profiles.append(dict(profile, worker_cpus=cpus[:profile['workers']]))
+
+    print(f"{'intra':>6} {'inter':>6} {'cv2':>5} {'workers':>8} {'pinned':>7} {'req/s':>8} {'p50 ms':>7} {'p99 ms':>7}")
+    results = []
+    for profile in profiles:
+        command = [sys.executable, __file__, "--data", args.data, "--requests", str(args.requests),
+                   "--run-one", json.dumps(profile)]
+        if args.crop:
+            command.append("--crop")
+        output = subprocess.run(command, capture_output=True, text=True)
+        if output.returncode != 0:
+            print(f"Profile {profile} failed:\n{output.stderr[-2000:]}")
+            continue
+
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        results.append((profile, result))
+        print(f"{str(profile['tf_intra_op_threads']):>6} {str(profile['tf_inter_op_threads']):>6} "
+              f"{str(profile['cv2_threads']):>5} {profile['workers']:>8} {str(bool(profile['worker_cpus'])):>7} "
+              f"{result['throughput']:>8.1f} {result['p50_ms']:>7.1f} {result['p99_ms']:>7.1f}")
+
+    if not results:
+        return
+
+    best_throughput = max(results, key=lambda item: item[1]['throughput'])
+    best_latency = min(results, key=lambda item: item[1]['p99_ms'])
+    print(f"Best throughput: {best_throughput[1]['throughput']:.1f} req/s with {best_throughput[0]}")
+    print(f"Best p99 latency: {best_latency[1]['p99_ms']:.1f} ms with {best_latency[0]}")
+
+    best = best_throughput if args.objective == "throughput" else best_latency
+    with open(args.output, 'w') as f:
+        json.dump(best[0], f, indent=2)
+    print(f"Saved {args.objective} profile to {args.output}, use it with CPU_PROFILE={args.output}")
+
+
+if __name__ == "__main__":
+    main()
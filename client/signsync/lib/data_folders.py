@@ -0,0 +1,30 @@
+import os
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def list_samples(data_dir, registry=None):
+    """
+    List the labelled images under a Data folder
+
+    Args:
+        data_dir (str): Folder with one sub-folder of images per label
+        registry (LabelRegistry): Model labels, other folders are skipped;
+            None keeps every folder
+
+    Returns:
+        list: (label, path) pairs, sorted by folder then file name
+    """
+    samples = []
+    for label in sorted(os.listdir(data_dir)):
+        folder = os.path.join(data_dir, label)
+        if not os.path.isdir(folder):
+            continue
+        if registry is not None and label not in registry:
+            print(f"Skipping '{label}': not a model label")
+            continue
+        for filename in sorted(os.listdir(folder)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((label, os.path.join(folder, filename)))
+    return samples
+
@@ -0,0 +1,197 @@
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from cpu_profile_bench import parse_values
+from data_folders import list_samples
+from model_handler import HandSignModel
+
+STAGES = ('decode', 'detect', 'preprocess', 'inference', 'total')
+
+
+class DetectionCache:
+    """Hand detections keyed by image content and detection settings
+
+    Re-running with a different preprocessing setting reuses the stored
+    hands instead of running MediaPipe again.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+        self.dirty = False
+
+    @staticmethod
+    def key(image_bytes, detect_max_side):
+        return f"{hashlib.sha1(image_bytes).hexdigest()}:{detect_max_side}"
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, hands, seconds):
+        self.entries[key] = {
+            'hands': [{'lmList': hand['lmList'], 'bbox': list(hand['bbox']), 'type': hand['type']} for hand in hands],
+            'detect': seconds
+        }
+        self.dirty = True
+
+    def save(self):
+        if self.path and self.dirty:
+            with open(self.path, 'w') as f:
+                json.dump(self.entries, f)
+            self.dirty = False
+
+
+def detect(model, image_data):
+    """Decode and detect on a worker thread, returning (hands, seconds)"""
+    img = model._decode_image(image_data)
+    if img is None:
+        return [], 0.0
+    start_time = time.time()
+    hands = model._detect_hands(img)
+    return hands, time.time() - start_time
+
+
+def run_setting(model, samples, cache, mode, detect_max_side, offset):
+    """
+    Run every sample through the pipeline with one setting
+
+    Detection runs (or comes from the cache) first. All crops are then
+    submitted together so the batcher classifies them in large batches.
+
+    Returns:
+        tuple: (list of (label, predicted), dict of stage -> latencies)
+    """
+    if mode == 'image':
+        model.detect_max_side = detect_max_side
+    model.offset = offset
+
+    images = []
+    for label, path in samples:
+        with open(path, 'rb') as f:
+            image_bytes = f.read()
+        images.append((label, image_bytes, base64.b64encode(image_bytes).decode('ascii')))
+
+    # Stage 1: hands, from the cache where possible
+    detections = [None] * len(images)
+    if mode == 'image':
+        pending = {}
+        for i, (_, image_bytes, image_data) in enumerate(images):
+            key = DetectionCache.key(image_bytes, detect_max_side)
+            entry = cache.get(key)
+            if entry is not None:
+                detections[i] = entry
+            else:
+                pending[i] = (key, model.executor.submit(detect, model, image_data))
+
+        for i, (key, future) in pending.items():
+            hands, seconds = future.result()
+            cache.put(key, hands, seconds)
+            detections[i] = cache.get(key)
+        cache.save()
+
+    # Stage 2: preprocessing and batched inference
+    futures = []
+    for i, (_, _, image_data) in enumerate(images):
+        if mode == 'image' and not detections[i]['hands']:
+            futures.append(None)
+        else:
+            hands = detections[i]['hands'] if mode == 'image' else None
+            # top_k skips the confidence threshold so every frame gets a label
+            futures.append(model.submit_crop(image_data, hands=hands, top_k=1))
+
+    outcomes = []
+    latencies = defaultdict(list)
+    for i, future in enumerate(futures):
+        label = images[i][0]
+        if future is None:
+            outcomes.append((label, 'no hand'))
+            continue
+
+        result = future.result()
+        outcomes.append((label, result.get('label', 'error')))
+
+        timings = result.get('timings', {})
+        detect_time = detections[i]['detect'] if mode == 'image' else 0.0
+        for stage in ('decode', 'preprocess', 'inference'):
+            if stage in timings:
+                latencies[stage].append(timings[stage])
+        latencies['detect'].append(detect_time)
+        latencies['total'].append(result.get('processing_time', 0.0) + detect_time)
+    return outcomes, latencies
+
+
+def report(name, outcomes, latencies):
+    """Print accuracy, the confusion matrix, per-class precision/recall and latency percentiles"""
+    truths = sorted(set(label for label, _ in outcomes))
+    predictions = sorted(set(predicted for _, predicted in outcomes) - set(truths))
+    columns = truths + predictions
+
+    counts = defaultdict(int)
+    for label, predicted in outcomes:
+        counts[(label, predicted)] += 1
+
+    correct = sum(counts[(label, label)] for label in truths)
+    print(f"\n== {name}: accuracy {correct}/{len(outcomes)} ({correct / max(len(outcomes), 1):.1%})")
+
+    width = max(len(c) for c in columns + ['truth']) + 1
+    print(f"{'truth':>{width}} " + ' '.join(f"{c:>{width}}" for c in columns))
+    for label in truths:
+        print(f"{label:>{width}} " + ' '.join(f"{counts[(label, c)]:>{width}}" for c in columns))
+
+    print(f"{'class':>{width}} {'precision':>10} {'recall':>8}")
+    for label in truths:
+        predicted_as = sum(counts[(truth, label)] for truth in truths)
+        actual = sum(counts[(label, c)] for c in columns)
+        precision = counts[(label, label)] / predicted_as if predicted_as else 0.0
+        recall = counts[(label, label)] / actual if actual else 0.0
+        print(f"{label:>{width}} {precision:>10.2f} {recall:>8.2f}")
+
+    print(f"{'stage':>10} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    for stage in STAGES:
+        values = latencies.get(stage)
+        if values:
+            p50, p90, p99 = np.percentile(values, [50, 90, 99]) * 1000
+            print(f"{stage:>10} {p50:>8.1f} {p90:>8.1f} {p99:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and latency of the HandSignModel pipeline over labelled folders")
+    parser.add_argument("--data", default="backendv2/Data", help="Folder with one sub-folder of images per label")
+    parser.add_argument("--mode", default="image,crop",
+                        help="'image' runs server-side detection, 'crop' treats each image as a client crop")
+    parser.add_argument("--detect-max-side", default="640", help="Comma separated detection resolutions")
+    parser.add_argument("--offset", default="20", help="Comma separated crop paddings")
+    parser.add_argument("--cache", default="eval_detections.json", help="Detection cache file")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    model = HandSignModel(workers=args.workers)
+    samples = list_samples(args.data, model.label_registry)
+    if not samples:
+        print("No labelled images found. Exiting.")
+        return
+
+    cache = DetectionCache(args.cache)
+
+    for mode in args.mode.split(','):
+        detect_sides = parse_values(args.detect_max_side) if mode == 'image' else [0]
+        for detect_max_side, offset in itertools.product(detect_sides, parse_values(args.offset)):
+            name = f"mode={mode} offset={offset}" + (f" detect_max_side={detect_max_side}" if mode == 'image' else '')
+            outcomes, latencies = run_setting(model, samples, cache, mode, detect_max_side, offset)
+            report(name, outcomes, latencies)
+
+    model.close()
+
+
+if __name__ == "__main__":
+    main()
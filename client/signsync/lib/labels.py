@@ -0,0 +1,47 @@
+import hashlib
+import os
+
+
+class LabelRegistry:
+    """Model labels loaded once, with O(1) lookups both ways and a version hash
+
+    The version covers the label file and the model weights, so it changes
+    whenever either is replaced and can be used as an HTTP ETag.
+    """
+    def __init__(self, names, model_path=None):
+        self.names = list(names)
+        self.indexes = {name: index for index, name in enumerate(self.names)}
+
+        digest = hashlib.sha256("\n".join(self.names).encode('utf-8'))
+        if model_path and os.path.exists(model_path):
+            with open(model_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        self.version = digest.hexdigest()[:16]
+
+    @classmethod
+    def load(cls, labels_path, model_path=None):
+        """Read labels.txt, accepting both 'Hello' and '0 Hello' lines"""
+        names = []
+        with open(labels_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                prefix, _, rest = line.partition(' ')
+                names.append(rest if prefix.isdigit() and rest else line)
+        return cls(names, model_path)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.indexes
+
+    def name(self, index):
+        """Label for a model output index"""
+        return self.names[index]
+
+    def index(self, name):
+        """Model output index for a label, raising KeyError if unknown"""
+        return self.indexes[name]
@@ -0,0 +1,164 @@
+import argparse
+import base64
+import threading
+import time
+import uuid
+from collections import Counter
+
+import numpy as np
+import requests
+
+
+def percentile(values, q):
+    """Percentile of a list, or 0 when it is empty"""
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def run_client(url, payload, headers, stop_time, latencies, statuses, lock):
+    """
+    Post frames back to back until stop_time, like a streaming phone
+
+    Args:
+        url (str): Translate endpoint
+        payload (dict): JSON body to send
+        headers (dict): Request headers
+        stop_time (float): time.monotonic() value to stop at
+        latencies (list): Shared list of successful request latencies
+        statuses (Counter): Shared count of response status codes
+        lock (threading.Lock): Guards latencies and statuses
+    """
+    session = requests.Session()
+    while time.monotonic() < stop_time:
+        start_time = time.monotonic()
+        try:
+            response = session.post(url, json=payload, headers=headers, timeout=30)
+            status = response.status_code
+        except requests.RequestException:
+            status = 'failed'
+        elapsed = time.monotonic() - start_time
+
+        with lock:
+            statuses[status] += 1
+            if status in (200, 400):
+                latencies.append(elapsed)
+
+        if status in (429, 503):
+            # Back off for as long as the server asked
+            time.sleep(float(response.headers.get('Retry-After', 1)))
+
+
+def run_login_client(url, credentials, stop_time, latencies, statuses, lock):
+    """
+    Sign in back to back until stop_time, like a burst of app launches
+
+    Args:
+        url (str): Login endpoint
+        credentials (dict): email and password to post
+        stop_time (float): time.monotonic() value to stop at
+        latencies (list): Shared list of answered login latencies
+        statuses (Counter): Shared count of login status codes
+        lock (threading.Lock): Guards latencies and statuses
+    """
+    session = requests.Session()
+    while time.monotonic() < stop_time:
+        start_time = time.monotonic()
+        try:
+            status = session.post(url, json=credentials, timeout=30).status_code
+        except requests.RequestException:
+            status = 'failed'
+        elapsed = time.monotonic() - start_time
+
+        with lock:
+            statuses[status] += 1
+            if status in (200, 401):
+                latencies.append(elapsed)
+
+
+def run_load(url, image, clients, duration, deadline_ms, login_url=None, login_clients=0, credentials=None):
+    """
+    Run one load level
+
+    Args:
+        url (str): Translate endpoint
+        image (str): Base64 encoded frame
+        clients (int): Number of concurrent streaming clients
+        duration (float): Seconds to run
+        deadline_ms (int): Deadline sent with every request
+        login_url (str): Login endpoint for mixed auth traffic
+        login_clients (int): Number of concurrent clients signing in
+        credentials (dict): email and password the login clients post
+
+    Returns:
+        tuple: (latencies, statuses, login_latencies, login_statuses)
+    """
+    latencies = []
+    statuses = Counter()
+    login_latencies = []
+    login_statuses = Counter()
+    lock = threading.Lock()
+    stop_time = time.monotonic() + duration
+
+    threads = []
+    for _ in range(login_clients):
+        thread = threading.Thread(
+            target=run_login_client,
+            args=(login_url, credentials, stop_time, login_latencies, login_statuses, lock)
+        )
+        thread.start()
+        threads.append(thread)
+
+    for _ in range(clients):
+        headers = {'X-Session-Id': uuid.uuid4().hex, 'X-Deadline-Ms': str(deadline_ms)}
+        thread = threading.Thread(
+            target=run_client,
+            args=(url, {'image': image}, headers, stop_time, latencies, statuses, lock)
+        )
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, login_latencies, login_statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/translate and report latency percentiles")
+    parser.add_argument("--url", default="http://localhost:5000/api/translate")
+    parser.add_argument("--image", default="backendv2/Data/Yes/Image_1740170822.636752.jpg")
+    parser.add_argument("--clients", default="32",
+                        help="Concurrent clients, or a comma separated list to sweep (e.g. 16,64,256,512)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run each level")
+    parser.add_argument("--deadline-ms", type=int, default=1500)
+    parser.add_argument("--login-clients", type=int, default=0,
+                        help="Concurrent clients signing in alongside the translate traffic")
+    parser.add_argument("--login-url", default="http://localhost:5000/api/login")
+    parser.add_argument("--email", default="loadtest@example.com")
+    parser.add_argument("--password", default="loadtest")
+    args = parser.parse_args()
+    credentials = {'email': args.email, 'password': args.password}
+
+    with open(args.image, 'rb') as file:
+        image = base64.b64encode(file.read()).decode('ascii')
+
+    print(f"{'clients':>8} {'req/s':>8} {'200/400':>8} {'429':>6} {'503':>6} {'failed':>7} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}  deadline")
+    for clients in [int(c) for c in args.clients.split(',')]:
+        latencies, statuses, login_latencies, login_statuses = run_load(
+            args.url, image, clients, args.duration, args.deadline_ms,
+            args.login_url, args.login_clients, credentials
+        )
+
+        p99 = percentile(latencies, 99) * 1000
+        verdict = "OK" if latencies and p99 <= args.deadline_ms else "FAIL"
+        print(f"{clients:>8} {len(latencies) / args.duration:>8.1f} {len(latencies):>8} "
+              f"{statuses[429]:>6} {statuses[503]:>6} {statuses['failed']:>7} "
+              f"{percentile(latencies, 50) * 1000:>7.0f} {percentile(latencies, 95) * 1000:>7.0f} "
+              f"{p99:>7.0f}  {verdict}")
+        if args.login_clients:
+            print(f"{'':>8} logins: {dict(login_statuses)}, "
+                  f"p50 {percentile(login_latencies, 50) * 1000:.0f} ms, "
+                  f"p99 {percentile(login_latencies, 99) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
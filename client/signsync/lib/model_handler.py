@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
 from cvzone.HandTrackingModule import HandDetector
+import mediapipe as mp
 import tensorflow as tf
 import os
 import base64
@@ -8,26 +9,67 @@ from io import BytesIO
 from PIL import Image
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, Future
+from batcher import InferenceBatcher
+from sequence import SequenceTracker
+from recording import SessionRecorder
+from labels import LabelRegistry
+from cpu_profile import CpuProfile
+
+
+def temperature_scale(prediction, temperature):
+    """Rescale softmax outputs with a fitted temperature"""
+    if temperature == 1.0:
+        return prediction
+    logits = np.log(np.clip(prediction, 1e-12, 1.0)) / temperature
+    logits -= logits.max(axis=-1, keepdims=True)
+    scaled = np.exp(logits)
+    return scaled / scaled.sum(axis=-1, keepdims=True)
+
 
 class HandSignModel:
-    def _init_(self):
-        # Initialize with optimized parameters
-        self.detector = HandDetector(
-            maxHands=2,
-            detectionCon=0.8,
-            minTrackCon=0.5
-        )
+    def __init__(self, workers=4, max_batch=16, batch_wait=0.005, record_dir=None, record_crop_size=None,
+                 cpu_profile=None):
+        # Thread pool sizes and pinning, applied before TensorFlow starts its pools
+        self.cpu_profile = cpu_profile or CpuProfile(workers=workers)
+        self.cpu_profile.apply()
+        
+        # Each worker thread gets its own HandDetector, MediaPipe graphs are not thread-safe
+        self.workers = self.cpu_profile.workers
+        self.thread_state = threading.local()
         self.imgSize = 224
         self.offset = 20
         self.min_confidence = 0.8  # Minimum confidence threshold
         
+        # Multi-resolution detection: detect on a downscaled copy, then search
+        # only around the last hand seen in each session
+        self.detect_max_side = 640  # Longest side of the image given to MediaPipe
+        self.roi_margin = 1.0  # ROI padding as a fraction of the last hand box size
+        self.roi_ttl = 2.0  # Seconds before a session's ROI is forgotten
+        self.roi_refresh_interval = 15  # Full-frame search every N frames per session
+        self.session_rois = {}
+        self.session_lock = threading.Lock()
+        
+        # Dynamic signs (J, Z, Hello, ...) are spotted over each session's
+        # landmark stream, templates are trained by train_sequences.py
+        self.sequences = SequenceTracker.load("Model/sequence_templates.npz")
+        
+        # Optional landmark/probability recording of sessions for replay.py
+        self.recorder = SessionRecorder(record_dir, crop_size=record_crop_size) if record_dir else None
+        
         # Load model with thread-safe initialization
         self.model_lock = threading.Lock()
         self._initialize_model()
         
-        # Thread pool for parallel processing
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        # Decode/detect/crop run in parallel on the pool, the model runs on
+        # the batcher thread so concurrent requests share forward passes
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="hand-worker",
+            initializer=self.cpu_profile.pin_worker
+        )
+        self.batcher = InferenceBatcher(self._predict_batch, max_batch=max_batch, max_wait=batch_wait)
         
     def _initialize_model(self):
         """Thread-safe model initialization"""
@@ -44,44 +86,237 @@ class HandSignModel:
                 dummy_input = np.zeros((1, self.imgSize, self.imgSize, 3), dtype=np.float32)
                 self.model.predict(dummy_input)
                 
-                # Load labels
-                with open("Model/labels.txt", "r") as f:
-                    self.labels = [line.strip() for line in f if line.strip()]
+                # Load labels, versioned together with the model weights
+                self.label_registry = LabelRegistry.load("Model/labels.txt", "Model/keras_model.h5")
+                self.labels = self.label_registry.names
+                
+                # Load calibration temperature (fitted by calibrate.py)
+                self.temperature = 1.0
+                if os.path.exists("Model/temperature.txt"):
+                    with open("Model/temperature.txt", "r") as f:
+                        self.temperature = float(f.read().strip())
     
     def get_labels(self):
         """Get available labels"""
         return self.labels
     
-    def process_image(self, image_data):
-        """Process image data with error handling and performance optimizations"""
+    @property
+    def detector(self):
+        """HandDetector owned by the calling thread"""
+        detector = getattr(self.thread_state, 'detector', None)
+        if detector is None:
+            detector = HandDetector(
+                maxHands=2,
+                detectionCon=0.8,
+                minTrackCon=0.5
+            )
+            self.thread_state.detector = detector
+        return detector
+    
+    def process_image(self, image_data, top_k=None, session_id=None):
+        """Process image data with error handling and performance optimizations
+        
+        When top_k is given, the k most likely labels are returned with their
+        calibrated probabilities instead of rejecting low confidence frames.
+        Frames sharing a session_id are searched around the last detected hand.
+        """
+        return self.submit_image(image_data, top_k, session_id).result()
+    
+    def process_crop(self, crop_data, hands=None, top_k=None):
+        """Classify a hand crop produced on the client, skipping detection
+        
+        hands holds the client's landmarks ('lmList', 'bbox', 'type') in crop
+        coordinates. Without it the whole crop is treated as a single hand.
+        """
+        return self.submit_crop(crop_data, hands, top_k).result()
+    
+    async def process_image_async(self, image_data, top_k=None, session_id=None):
+        """Awaitable process_image, no thread is held while waiting for the result"""
+        return await asyncio.wrap_future(self.submit_image(image_data, top_k, session_id))
+    
+    async def process_crop_async(self, crop_data, hands=None, top_k=None):
+        """Awaitable process_crop, no thread is held while waiting for the result"""
+        return await asyncio.wrap_future(self.submit_crop(crop_data, hands, top_k))
+    
+    def submit_image(self, image_data, top_k=None, session_id=None):
+        """Queue an image and return a concurrent.futures.Future of the result dict"""
+        return self._submit(self._prepare_image, (image_data, session_id), top_k)
+    
+    def submit_crop(self, crop_data, hands=None, top_k=None):
+        """Queue a client crop and return a concurrent.futures.Future of the result dict"""
+        return self._submit(self._prepare_crop, (crop_data, hands), top_k)
+    
+    def _submit(self, prepare, args, top_k):
+        """Run prepare on the worker pool, then hand its crops to the batcher"""
+        result_future = Future()
+        start_time = time.time()
+        
+        prepared = self.executor.submit(prepare, *args)
+        prepared.add_done_callback(
+            lambda f: self._on_prepared(f, result_future, top_k, start_time)
+        )
+        return result_future
+    
+    def _on_prepared(self, prepared, result_future, top_k, start_time):
+        try:
+            result = prepared.result()
+            if 'error' in result:
+                result_future.set_result(result)
+                return
+            
+            inference_start = time.time()
+            predicted = self.batcher.submit(result['crops'])
+            predicted.add_done_callback(
+                lambda f: self._on_predicted(f, result_future, result, top_k, start_time, inference_start)
+            )
+        except Exception as e:
+            result_future.set_result({"error": f"Processing error: {str(e)}"})
+    
+    def _on_predicted(self, predicted, result_future, prepared, top_k, start_time, inference_start):
+        try:
+            timings = prepared['timings']
+            prediction = temperature_scale(predicted.result(), self.temperature)
+            timings['inference'] = time.time() - inference_start
+            
+            probabilities = self._fuse_probabilities(prediction)
+            result = self._result_from_probabilities(probabilities, top_k)
+            
+            if self.recorder is not None and prepared.get('session_id') is not None:
+                self.recorder.record(prepared['session_id'], prepared['hands'], probabilities, prepared['crops'][0])
+            
+            # A completed dynamic sign takes precedence over the static frame
+            sequence = prepared.get('sequence')
+            if sequence is not None:
+                # The static class fields describe another sign, report the match instead
+                result = {
+                    "label": sequence['label'],
+                    "confidence": sequence['confidence'],
+                    "sequence": sequence
+                }
+                if top_k:
+                    result["top_k"] = [{"label": sequence['label'], "probability": sequence['confidence']}]
+            
+            # Add processing time to result
+            result['processing_time'] = time.time() - start_time
+            result['timings'] = timings
+            result_future.set_result(result)
+        except Exception as e:
+            result_future.set_result({"error": f"Processing error: {str(e)}"})
+    
+    def _prepare_image(self, image_data, session_id=None):
+        """Decode, detect and crop on a worker thread"""
         try:
             start_time = time.time()
+            timings = {}
             
             # Decode image
             img = self._decode_image(image_data)
+            timings['decode'] = time.time() - start_time
             if img is None:
                 return {"error": "Invalid image data"}
             
             # Detect hands
-            hands, _ = self.detector.findHands(img)
+            stage_start = time.time()
+            hands = self._detect_hands(img, session_id)
+            timings['detect'] = time.time() - stage_start
             if not hands:
                 return {"error": "No hands detected"}
             
-            # Process hands
-            if len(hands) == 1:
-                result = self._process_single_hand(img, hands[0])
-            elif len(hands) == 2:
-                result = self._process_two_hands(img, hands)
+            prepared = self._hand_crops(img, hands, timings)
+            prepared['hands'] = hands
+            prepared['session_id'] = session_id
+            
+            if self.sequences is not None and session_id is not None:
+                stage_start = time.time()
+                sequence = self.sequences.push(session_id, hands)
+                timings['sequence'] = time.time() - stage_start
+                if sequence is not None:
+                    prepared['sequence'] = sequence
+            
+            return prepared
+            
+        except Exception as e:
+            return {"error": f"Processing error: {str(e)}"}
+    
+    def _prepare_crop(self, crop_data, hands=None):
+        """Decode and crop a client upload on a worker thread"""
+        try:
+            start_time = time.time()
+            timings = {}
+            
+            # Decode crop
+            img = self._decode_image(crop_data)
+            timings['decode'] = time.time() - start_time
+            if img is None:
+                return {"error": "Invalid image data"}
+            
+            if hands:
+                hands = self._parse_client_hands(hands, img.shape)
+                if hands is None:
+                    return {"error": "Invalid hand landmarks"}
+                self._draw_hands(img, [hand for hand in hands if 'lmList' in hand])
             else:
-                return {"error": "Too many hands detected"}
+                hands = [{'bbox': (0, 0, img.shape[1], img.shape[0])}]
             
-            # Add processing time to result
-            result['processing_time'] = time.time() - start_time
-            return result
+            return self._hand_crops(img, hands, timings)
             
         except Exception as e:
             return {"error": f"Processing error: {str(e)}"}
     
+    def _hand_crops(self, img, hands, timings):
+        """Model inputs for the detected hands
+        
+        A single hand gives one crop. Two hands give both hand crops plus the
+        combined crop, which are classified together and fused.
+        """
+        stage_start = time.time()
+        if len(hands) == 1:
+            bboxes = [hands[0]['bbox']]
+        elif len(hands) == 2:
+            bboxes = [hand['bbox'] for hand in hands] + [self._union_bbox(hands)]
+        else:
+            return {"error": "Too many hands detected"}
+        
+        crops = [self._crop_hand(img, bbox) for bbox in bboxes]
+        crops = [crop for crop in crops if crop is not None]
+        timings['preprocess'] = time.time() - stage_start
+        
+        if len(crops) == 0:
+            return {"error": "Invalid hand crop" if len(hands) == 1 else "Could not process either hand"}
+        
+        return {"crops": crops, "timings": timings}
+    
+    def _parse_client_hands(self, hands, shape):
+        """Validate client supplied hands, deriving missing bboxes from landmarks"""
+        try:
+            parsed = []
+            for hand in hands:
+                parsed_hand = {'type': str(hand.get('type', ''))}
+                
+                if hand.get('lmList'):
+                    lmList = [[int(v) for v in point[:3]] for point in hand['lmList']]
+                    if len(lmList) != 21 or any(len(point) != 3 for point in lmList):
+                        return None
+                    parsed_hand['lmList'] = lmList
+                
+                if hand.get('bbox'):
+                    x, y, w, h = [int(v) for v in hand['bbox']]
+                elif 'lmList' in parsed_hand:
+                    xs = [point[0] for point in parsed_hand['lmList']]
+                    ys = [point[1] for point in parsed_hand['lmList']]
+                    x, y, w, h = min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+                else:
+                    return None
+                
+                # The box has to overlap the image, a negative end would slice from the far edge
+                if w <= 0 or h <= 0 or x >= shape[1] or y >= shape[0] or x + w <= 0 or y + h <= 0:
+                    return None
+                parsed_hand['bbox'] = (x, y, w, h)
+                parsed.append(parsed_hand)
+            return parsed
+        except (TypeError, ValueError, AttributeError):
+            return None
+    
     def _decode_image(self, image_data):
         """Decode base64 image data to numpy array"""
         try:
@@ -95,9 +330,103 @@ class HandSignModel:
             print(f"Error decoding image: {e}")
             return None
     
-    def _process_single_hand(self, img, hand):
-        """Process single hand detection"""
-        x, y, w, h = hand['bbox']
+    def _detect_hands(self, img, session_id=None):
+        """Detect hands, searching the session's region of interest first"""
+        roi = self._session_roi(img, session_id)
+        
+        hands = []
+        if roi is not None:
+            x1, y1, x2, y2 = roi
+            hands = self._find_hands_scaled(img[y1:y2, x1:x2], x1, y1)
+        
+        # Fall back to the whole frame
+        if not hands:
+            hands = self._find_hands_scaled(img, 0, 0)
+        
+        self._update_session_roi(session_id, hands)
+        
+        # Crops are taken from the annotated frame, as in the training data
+        self._draw_hands(img, hands)
+        return hands
+    
+    def _find_hands_scaled(self, img, offset_x, offset_y):
+        """Run MediaPipe on a downscaled copy and map results back to full resolution"""
+        scale = min(1.0, self.detect_max_side / max(img.shape[:2]))
+        if scale < 1.0:
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        hands = self.detector.findHands(img, draw=False)
+        
+        for hand in hands:
+            hand['lmList'] = [
+                [int(px / scale) + offset_x, int(py / scale) + offset_y, int(pz / scale)]
+                for px, py, pz in hand['lmList']
+            ]
+            x, y, w, h = hand['bbox']
+            hand['bbox'] = (int(x / scale) + offset_x, int(y / scale) + offset_y,
+                            int(w / scale), int(h / scale))
+            cx, cy = hand['center']
+            hand['center'] = (int(cx / scale) + offset_x, int(cy / scale) + offset_y)
+        return hands
+    
+    def _draw_hands(self, img, hands):
+        """Draw the same overlay HandDetector.findHands draws at full resolution"""
+        for hand in hands:
+            lmList = hand['lmList']
+            for start, end in mp.solutions.hands.HAND_CONNECTIONS:
+                cv2.line(img, tuple(lmList[start][:2]), tuple(lmList[end][:2]), (224, 224, 224), 2)
+            for px, py, _ in lmList:
+                cv2.circle(img, (px, py), 2, (0, 0, 255), 2)
+            
+            x, y, w, h = hand['bbox']
+            cv2.rectangle(img, (x - 20, y - 20), (x + w + 20, y + h + 20), (255, 0, 255), 2)
+            cv2.putText(img, hand['type'], (x - 30, y - 30), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 255), 2)
+    
+    def _session_roi(self, img, session_id):
+        """Region around the session's last hand box, or None to search the whole frame"""
+        if session_id is None:
+            return None
+        
+        with self.session_lock:
+            state = self.session_rois.get(session_id)
+            if state is None or time.time() - state['time'] > self.roi_ttl:
+                return None
+            
+            # Periodically search the whole frame so new hands are picked up
+            state['frames'] += 1
+            if state['frames'] % self.roi_refresh_interval == 0:
+                return None
+            x, y, w, h = state['bbox']
+        
+        pad = int(max(w, h) * self.roi_margin)
+        x1, y1 = max(0, x - pad), max(0, y - pad)
+        x2, y2 = min(img.shape[1], x + w + pad), min(img.shape[0], y + h + pad)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return x1, y1, x2, y2
+    
+    def _update_session_roi(self, session_id, hands):
+        """Remember where the session's hands were found"""
+        if session_id is None:
+            return
+        
+        now = time.time()
+        with self.session_lock:
+            if not hands:
+                self.session_rois.pop(session_id, None)
+                return
+            
+            state = self.session_rois.setdefault(session_id, {'frames': 0})
+            state['bbox'] = self._union_bbox(hands)
+            state['time'] = now
+            
+            # Drop sessions that went quiet
+            for key in [k for k, v in self.session_rois.items() if now - v['time'] > self.roi_ttl]:
+                del self.session_rois[key]
+    
+    def _crop_hand(self, img, bbox):
+        """Crop a padded bbox and letterbox it onto a white square"""
+        x, y, w, h = bbox
         
         # Create white background
         imgWhite = np.ones((self.imgSize, self.imgSize, 3), np.uint8) * 255
@@ -108,7 +437,7 @@ class HandSignModel:
         imgCrop = img[y1:y2, x1:x2]
         
         if imgCrop.size == 0:
-            return {"error": "Invalid hand crop"}
+            return None
         
         # Resize maintaining aspect ratio
         aspectRatio = h / w
@@ -125,42 +454,52 @@ class HandSignModel:
             hGap = int((self.imgSize - hCal) / 2)
             imgWhite[hGap:hCal + hGap, :] = imgResize
         
-        # Preprocess and predict
+        # Preprocess for the model
         imgWhite = cv2.cvtColor(imgWhite, cv2.COLOR_BGR2RGB)
-        imgWhite = imgWhite.astype('float32') / 255.0
-        imgWhite = np.expand_dims(imgWhite, axis=0)
-        
+        return imgWhite.astype('float32') / 255.0
+    
+    def _predict_batch(self, batch):
+        """Run a single forward pass over a stacked batch of preprocessed crops"""
         with self.model_lock:
-            prediction = self.model.predict(imgWhite)
+            return self.model.predict_on_batch(batch)
+    
+    def _result_from_probabilities(self, probabilities, top_k=None):
+        """Build the response dict from a probability vector"""
+        index = int(np.argmax(probabilities))
+        confidence = float(probabilities[index])
+        
+        result = {
+            "label": self.label_registry.name(index),
+            "confidence": confidence,
+            "probabilities": [float(p) for p in probabilities]
+        }
         
-        index = np.argmax(prediction)
-        confidence = float(prediction[0][index])
+        if top_k:
+            # Let the caller apply its own threshold
+            order = np.argsort(probabilities)[::-1][:top_k]
+            result["top_k"] = [
+                {"label": self.label_registry.name(i), "probability": float(probabilities[i])}
+                for i in order
+            ]
+            return result
         
         if confidence < self.min_confidence:
             return {"error": f"Low confidence prediction ({confidence:.2f})"}
         
-        # Only return the label for stream
-        return {
-            "label": self.labels[index]
-        }
+        return result
     
-    def _process_two_hands(self, img, hands):
-        """Process two hands detection (basic implementation)"""
-        # Process each hand separately and combine results
-        results = []
-        for hand in hands:
-            result = self._process_single_hand(img, hand)
-            if 'error' in result:
-                continue
-            results.append(result)
-        
-        if len(results) == 0:
-            return {"error": "Could not process either hand"}
-        
-        # Return the label from the most confident hand
-        best_result = max(results, key=lambda x: self.labels.index(x['label'])) 
-
-        return {"label": results[0]['label']} 
+    def _union_bbox(self, hands):
+        """Bounding box that encompasses both hands"""
+        min_x = min(hand['bbox'][0] for hand in hands)
+        min_y = min(hand['bbox'][1] for hand in hands)
+        max_x = max(hand['bbox'][0] + hand['bbox'][2] for hand in hands)
+        max_y = max(hand['bbox'][1] + hand['bbox'][3] for hand in hands)
+        return min_x, min_y, max_x - min_x, max_y - min_y
+    
+    def _fuse_probabilities(self, probabilities):
+        """Fuse per-view probability vectors, weighting each view by its own confidence"""
+        weights = probabilities.max(axis=1, keepdims=True)
+        return (probabilities * weights).sum(axis=0) / weights.sum()
     
     def save_training_data(self, image_data, label):
         """Save training data with improved error handling"""
@@ -178,7 +517,8 @@ class HandSignModel:
         except Exception as e:
             return {"error": str(e)}
     
-    def process_image_async(self, image_data, callback):
-        """Process image asynchronously with callback"""
-        future = self.executor.submit(self.process_image, image_data)
-        future.add_done_callback(lambda f: callback(f.result()))
\ No newline at end of file
+    def close(self):
+        """Stop accepting work and wait for the worker pool to finish"""
+        self.executor.shutdown(wait=True)
+        if self.recorder is not None:
+            self.recorder.flush()
\ No newline at end of file
@@ -0,0 +1,212 @@
+import asyncio
+import base64
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    """Samples every thread's stack and writes collapsed stacks for flamegraph.pl / speedscope"""
+    def __init__(self, directory, interval=0.005):
+        self.directory = directory
+        self.interval = interval  # Seconds between samples
+        self.running = False
+        self.lock = threading.Lock()
+
+    def start(self, seconds):
+        """Profile for `seconds` in the background, returning the output path or None if already running"""
+        with self.lock:
+            if self.running:
+                return None
+            self.running = True
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"profile_{int(time.time())}.folded")
+        threading.Thread(target=self._run, args=(seconds, path), name="sampling-profiler", daemon=True).start()
+        return path
+
+    def _run(self, seconds, path):
+        try:
+            samples = Counter()
+            own_id = threading.get_ident()
+            names = {}
+            stop_time = time.monotonic() + seconds
+
+            while time.monotonic() < stop_time:
+                names.update({thread.ident: thread.name for thread in threading.enumerate()})
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(frame_name(frame))
+                        frame = frame.f_back
+                    stack.append(names.get(thread_id, str(thread_id)))
+                    samples[';'.join(reversed(stack))] += 1
+                time.sleep(self.interval)
+
+            with open(path, 'w') as f:
+                for stack, count in samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        finally:
+            with self.lock:
+                self.running = False
+
+
+class SlowRequestCapture:
+    """Keeps the input, stage timings and thread stacks of slow requests
+
+    A watchdog snapshots all thread stacks as soon as a tracked request
+    passes the threshold, while it is still stuck. A request tracked inside
+    an asyncio task is a suspended coroutine rather than a thread, so its
+    await chain is saved as well. Captures go to one folder
+    each under `directory`; the oldest are deleted once the folder grows
+    past max_bytes. At most max_pending captures wait to be written, more are
+    dropped. Requests that end in one of the `ignore` exceptions, such as an
+    admission rejection, are not captured.
+    """
+    def __init__(self, directory, threshold=1.0, max_bytes=50 * 1024 * 1024, max_pending=8, ignore=()):
+        self.directory = directory
+        self.threshold = threshold  # Seconds
+        self.max_bytes = max_bytes
+        self.max_pending = max_pending
+        self.ignore = tuple(ignore)
+        self.in_flight = {}
+        self.pending = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-request-writer")
+
+        # Captures on disk, oldest first, with their sizes; read from the directory on the first save
+        self.captures = None
+        self.total_bytes = 0
+
+        threading.Thread(target=self._watch, name="slow-request-watchdog", daemon=True).start()
+
+    @contextmanager
+    def track(self, image_data=None):
+        """Time the enclosed request, the caller may add details such as 'timings' to the record"""
+        record = {'start': time.monotonic(), 'image': image_data}
+        try:
+            record['task'] = asyncio.current_task()
+        except RuntimeError:
+            pass  # No running event loop, the request has a thread of its own
+        key = id(record)
+        with self.lock:
+            self.in_flight[key] = record
+        try:
+            yield record
+        except self.ignore:
+            record['ignored'] = True
+            raise
+        except Exception:
+            record['exception'] = traceback.format_exc()
+            raise
+        finally:
+            elapsed = time.monotonic() - record['start']
+            with self.lock:
+                del self.in_flight[key]
+                save = elapsed >= self.threshold and not record.pop('ignored', False)
+                if save and self.pending >= self.max_pending:
+                    # The disk is behind, don't let captures pile up in memory
+                    self.dropped += 1
+                    save = False
+                if save:
+                    self.pending += 1
+            if save:
+                record['elapsed'] = elapsed
+                self.writer.submit(self._save, record)
+
+    def _watch(self):
+        while True:
+            time.sleep(self.threshold / 4)
+            now = time.monotonic()
+            with self.lock:
+                late = [record for record in self.in_flight.values()
+                        if 'stacks' not in record and now - record['start'] >= self.threshold]
+            if late:
+                stacks = self._stack_summary()
+                for record in late:
+                    record['stacks'] = stacks
+                    if record.get('task') is not None:
+                        record['task_stack'] = self._task_stack(record['task'])
+
+    def _stack_summary(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        summary = {}
+        for thread_id, frame in sys._current_frames().items():
+            summary[names.get(thread_id, str(thread_id))] = traceback.format_stack(frame)
+        return summary
+
+    def _task_stack(self, task):
+        """Where a suspended task is waiting, outermost coroutine first"""
+        frames = []
+        awaited = task.get_coro()
+        while awaited is not None:
+            frame = getattr(awaited, 'cr_frame', None) or getattr(awaited, 'gi_frame', None)
+            if frame is not None:
+                frames.append((frame, frame.f_lineno))
+            awaited = getattr(awaited, 'cr_await', None) or getattr(awaited, 'gi_yieldfrom', None)
+        return traceback.format_list(traceback.StackSummary.extract(frames))
+
+    def _save(self, record):
+        try:
+            self._write(record)
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def _write(self, record):
+        folder = os.path.join(self.directory, f"{time.time():.3f}_{record['elapsed'] * 1000:.0f}ms")
+        os.makedirs(folder, exist_ok=True)
+
+        image_data = record.pop('image', None)
+        if image_data:
+            try:
+                if ',' in image_data:
+                    image_data = image_data.split(',')[1]
+                with open(os.path.join(folder, 'frame.jpg'), 'wb') as f:
+                    f.write(base64.b64decode(image_data))
+            except Exception as e:
+                print(f"Error saving slow request frame: {e}")
+
+        record.pop('start', None)
+        record.pop('task', None)
+        with open(os.path.join(folder, 'info.json'), 'w') as f:
+            json.dump(record, f, indent=2, default=str)
+
+        self._trim(folder)
+
+    def _folder_size(self, path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+    def _trim(self, folder):
+        """Delete the oldest captures until the directory fits in max_bytes"""
+        if self.captures is None:
+            self.captures = deque()
+            for name in sorted(os.listdir(self.directory)):
+                path = os.path.join(self.directory, name)
+                if os.path.isdir(path):
+                    self.captures.append((path, self._folder_size(path)))
+            self.total_bytes = sum(size for _, size in self.captures)
+        else:
+            size = self._folder_size(folder)
+            self.captures.append((folder, size))
+            self.total_bytes += size
+
+        while self.total_bytes > self.max_bytes and self.captures:
+            path, size = self.captures.popleft()
+            shutil.rmtree(path, ignore_errors=True)
+            self.total_bytes -= size
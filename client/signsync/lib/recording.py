@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+MAX_HANDS = 2
+
+
+class SessionRecorder:
+    """Records per-session landmark streams to compact columnar files
+
+    Frames are buffered per session and flushed as compressed .npz chunks to
+    <directory>/<session_id>/<first timestamp>.npz. Every column is a
+    separate array: timestamps, hand counts, landmarks, bboxes, probabilities
+    and, optionally, downsampled crops. Files are written on a background
+    thread so recording never stalls inference.
+    """
+    def __init__(self, directory, flush_every=300, crop_size=None, idle_flush=10.0):
+        self.directory = directory
+        self.flush_every = flush_every  # Frames per chunk file
+        self.crop_size = crop_size  # Side of the stored crops, None to skip crops
+        self.idle_flush = idle_flush  # Seconds before a quiet session is written out
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-recorder")
+
+    def record(self, session_id, hands, probabilities, crop=None, timestamp=None):
+        """
+        Buffer one frame of a session
+
+        Args:
+            session_id (str): Session the frame belongs to
+            hands (list): Hand dicts with 'lmList' and 'bbox'
+            probabilities (numpy.ndarray): Probability vector returned for the frame
+            crop (numpy.ndarray): Preprocessed model input, stored when crop_size is set
+            timestamp (float): Frame time, defaults to now
+        """
+        landmarks = np.zeros((MAX_HANDS, 21, 3), np.int16)
+        bboxes = np.zeros((MAX_HANDS, 4), np.int16)
+        for slot, hand in enumerate(hands[:MAX_HANDS]):
+            if hand.get('lmList'):
+                landmarks[slot] = hand['lmList']
+            bboxes[slot] = hand['bbox']
+
+        row = {
+            'timestamps': time.time() if timestamp is None else timestamp,
+            'hand_counts': min(len(hands), MAX_HANDS),
+            'landmarks': landmarks,
+            'bboxes': bboxes,
+            'probabilities': np.asarray(probabilities, np.float16)
+        }
+        if self.crop_size is not None and crop is not None:
+            crop = cv2.resize(crop, (self.crop_size, self.crop_size), interpolation=cv2.INTER_AREA)
+            row['crops'] = (crop * 255).astype(np.uint8)
+
+        with self.lock:
+            rows = self.sessions.setdefault(session_id, [])
+            rows.append(row)
+
+            ready = [session_id] if len(rows) >= self.flush_every else []
+            ready += [
+                key for key, value in self.sessions.items()
+                if key != session_id and row['timestamps'] - value[-1]['timestamps'] > self.idle_flush
+            ]
+            for key in ready:
+                self.writer.submit(self._write, key, self.sessions.pop(key))
+
+    def flush(self):
+        """Write every buffered frame to disk and wait for the writes to finish"""
+        with self.lock:
+            sessions, self.sessions = self.sessions, {}
+            writer, self.writer = self.writer, ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-recorder")
+        writer.shutdown(wait=True)
+
+        # Written on this thread, executors take no new work once the interpreter is exiting
+        for session_id, rows in sessions.items():
+            if rows:
+                self._write(session_id, rows)
+
+    def _write(self, session_id, rows):
+        # Session ids come from clients, keep them from escaping the directory
+        safe_id = re.sub(r'[^A-Za-z0-9_-]', '_', str(session_id))[:64]
+        folder = os.path.join(self.directory, safe_id)
+        os.makedirs(folder, exist_ok=True)
+
+        columns = {
+            'timestamps': np.array([row['timestamps'] for row in rows], np.float64),
+            'hand_counts': np.array([row['hand_counts'] for row in rows], np.uint8),
+            'landmarks': np.stack([row['landmarks'] for row in rows]),
+            'bboxes': np.stack([row['bboxes'] for row in rows]),
+            'probabilities': np.stack([row['probabilities'] for row in rows])
+        }
+        if all('crops' in row for row in rows):
+            columns['crops'] = np.stack([row['crops'] for row in rows])
+
+        np.savez_compressed(os.path.join(folder, f"{rows[0]['timestamps']:.3f}.npz"), **columns)
+
+
+def load_session(folder):
+    """
+    Load every chunk of a recorded session, in time order
+
+    Args:
+        folder (str): Session folder written by SessionRecorder
+
+    Returns:
+        dict: Column name to array
+    """
+    names = sorted((name for name in os.listdir(folder) if name.endswith('.npz')), key=lambda name: float(name[:-4]))
+    chunks = [np.load(os.path.join(folder, name)) for name in names]
+    if not chunks:
+        return None
+
+    keys = set(chunks[0].files)
+    for chunk in chunks[1:]:
+        keys &= set(chunk.files)
+    return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in keys}
+
+
+def session_hands(session, index):
+    """Rebuild the hand dicts of one recorded frame"""
+    hands = []
+    for slot in range(session['hand_counts'][index]):
+        lmList = session['landmarks'][index, slot].tolist()
+        hand = {'bbox': tuple(int(v) for v in session['bboxes'][index, slot])}
+        if any(any(point) for point in lmList):
+            hand['lmList'] = lmList
+        hands.append(hand)
+    return hands
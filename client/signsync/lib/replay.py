@@ -0,0 +1,139 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from recording import load_session, session_hands
+from sequence import SequenceRecognizer, landmark_features, load_templates
+
+
+def session_folders(path):
+    """Session folders under path, or path itself if it is a session folder"""
+    if any(name.endswith('.npz') for name in os.listdir(path)):
+        return [path]
+    return [
+        os.path.join(path, name) for name in sorted(os.listdir(path))
+        if os.path.isdir(os.path.join(path, name))
+    ]
+
+
+def replay_sequences(session, templates, window):
+    """
+    Feed recorded landmarks through the dynamic sign recognizer
+
+    Args:
+        session (dict): Columns loaded by load_session
+        templates (list): (label, template, threshold) triples
+        window (int): Longest sign in frames
+
+    Returns:
+        list: (frame index, match) for every completed sign
+    """
+    recognizer = SequenceRecognizer(templates, window)
+    events = []
+    for index in range(len(session['timestamps'])):
+        features = landmark_features(session_hands(session, index))
+        if features is None:
+            continue
+        match = recognizer.push(features)
+        if match is not None:
+            events.append((index, match))
+    return events
+
+
+def replay_classifier(session, model, img_size, batch_size):
+    """
+    Re-classify the recorded crops and compare with the recorded results
+
+    Only single hand frames are compared. Two hand frames were classified
+    as three fused views, and the recording keeps just the first of them.
+
+    Args:
+        session (dict): Columns loaded by load_session, including 'crops'
+        model (tf.keras.Model): Classifier
+        img_size (int): Model input size
+        batch_size (int): Crops per forward pass
+
+    Returns:
+        float or None: Fraction of compared frames whose top label matches
+            the recording, None if there is no single hand frame
+    """
+    single = session['hand_counts'] == 1
+    if not single.any():
+        return None
+    crops = session['crops'][single]
+    recorded = np.argmax(session['probabilities'][single], axis=1)
+
+    predicted = []
+    for start in range(0, len(crops), batch_size):
+        batch = np.stack([
+            cv2.resize(crop, (img_size, img_size)).astype('float32') / 255.0
+            for crop in crops[start:start + batch_size]
+        ])
+        predicted.append(np.argmax(model.predict_on_batch(batch), axis=1))
+
+    return float(np.mean(np.concatenate(predicted) == recorded))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions through the classifier and sequence stages")
+    parser.add_argument("recordings", help="Recording directory or a single session folder")
+    parser.add_argument("--templates", default="Model/sequence_templates.npz")
+    parser.add_argument("--window", type=int, default=60)
+    parser.add_argument("--model", help="Re-classify recorded crops with this model")
+    parser.add_argument("--img-size", type=int, default=224)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--min-agreement", type=float, default=0.0,
+                        help="Exit with an error if classifier agreement falls below this")
+    args = parser.parse_args()
+
+    templates = load_templates(args.templates) if os.path.exists(args.templates) else None
+
+    model = None
+    if args.model:
+        import tensorflow as tf
+        model = tf.keras.models.load_model(
+            args.model,
+            compile=False,
+            custom_objects={'DepthwiseConv2D': tf.keras.layers.DepthwiseConv2D}
+        )
+
+    failed = False
+    for folder in session_folders(args.recordings):
+        session = load_session(folder)
+        if session is None:
+            continue
+
+        frames = len(session['timestamps'])
+        duration = float(session['timestamps'][-1] - session['timestamps'][0])
+        start_time = time.time()
+
+        report = [f"{os.path.basename(folder)}: {frames} frames over {duration:.1f}s"]
+
+        if templates is not None:
+            events = replay_sequences(session, templates, args.window)
+            report.append(f"signs: {' '.join(match['label'] for _, match in events) or '-'}")
+
+        if model is not None and 'crops' in session:
+            agreement = replay_classifier(session, model, args.img_size, args.batch_size)
+            if agreement is None:
+                report.append("classifier agreement: no single hand frames")
+            else:
+                report.append(f"classifier agreement: {agreement:.1%}")
+                failed = failed or agreement < args.min_agreement
+
+        elapsed = time.time() - start_time
+        speedup = duration / elapsed if elapsed > 0 else float('inf')
+        report.append(f"replayed in {elapsed:.2f}s ({speedup:.0f}x real time)")
+        print("  ".join(report))
+
+    if failed:
+        print(f"FAIL: classifier agreement below {args.min_agreement:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+HAND_DIM = 63  # 21 landmarks x (x, y, z)
+FEATURE_DIM = 2 * HAND_DIM
+
+
+def landmark_features(hands):
+    """
+    Normalised landmark vector for up to two hands
+
+    Each hand is expressed relative to its wrist and scaled by its bbox so
+    the vector does not depend on where the hand is or how large the frame
+    is. Hands are ordered left to right in the image; a missing hand is
+    left as zeros.
+
+    Args:
+        hands (list): Hand dicts with 'lmList' and 'bbox'
+
+    Returns:
+        numpy.ndarray or None: FEATURE_DIM vector, or None without landmarks
+    """
+    hands = [hand for hand in hands if hand.get('lmList')]
+    if not hands:
+        return None
+
+    features = np.zeros(FEATURE_DIM, np.float32)
+    for slot, hand in enumerate(sorted(hands, key=lambda h: h['lmList'][0][0])[:2]):
+        lm = np.array(hand['lmList'], np.float32)
+        scale = max(hand['bbox'][2], hand['bbox'][3], 1)
+        features[slot * HAND_DIM:(slot + 1) * HAND_DIM] = ((lm - lm[0]) / scale).ravel()
+    return features
+
+
+class StreamingDTW:
+    """Subsequence DTW against one template, updated one frame at a time
+
+    This is the SPRING recurrence: each frame costs O(len(template)) and the
+    best alignment of the template ending at the current frame is always
+    available, so the window is never re-scanned. Alignments starting more
+    than max_length frames ago are dropped.
+    """
+    def __init__(self, template, max_length):
+        self.template = template
+        self.max_length = max_length
+        self.reset()
+
+    def reset(self):
+        m = len(self.template)
+        self.dist = np.full(m + 1, np.inf)
+        self.dist[0] = 0.0
+        self.start = np.zeros(m + 1, np.int64)
+
+    def update(self, features, t):
+        """
+        Advance by one frame
+
+        Args:
+            features (numpy.ndarray): Feature vector of frame t
+            t (int): Absolute frame index
+
+        Returns:
+            tuple: (length normalised distance, start frame) of the best match ending at t
+        """
+        m = len(self.template)
+        cost = np.linalg.norm(self.template - features, axis=1)
+
+        dist = np.empty(m + 1)
+        start = np.empty(m + 1, np.int64)
+        dist[0], start[0] = 0.0, t
+
+        for i in range(1, m + 1):
+            # Best of insertion, match and deletion
+            best, best_start = dist[i - 1], start[i - 1]
+            if self.dist[i - 1] < best:
+                best, best_start = self.dist[i - 1], self.start[i - 1]
+            if self.dist[i] < best:
+                best, best_start = self.dist[i], self.start[i]
+
+            dist[i] = cost[i - 1] + best
+            start[i] = best_start
+            if t - best_start >= self.max_length:
+                dist[i] = np.inf
+
+        self.dist, self.start = dist, start
+        return dist[m] / m, int(start[m])
+
+
+class SequenceRecognizer:
+    """Spots dynamic signs in one session's landmark stream"""
+    def __init__(self, templates, window=60, cooldown=10):
+        self.frames = 0  # Frames pushed so far
+        self.matchers = [
+            (label, threshold, StreamingDTW(template, window))
+            for label, template, threshold in templates
+        ]
+        self.cooldown = cooldown  # Frames to stay quiet after a match
+        self.quiet_until = 0
+
+    def push(self, features):
+        """
+        Add a frame and report a completed sign, if any
+
+        Args:
+            features (numpy.ndarray): Feature vector of the new frame
+
+        Returns:
+            dict or None: {'label', 'distance', 'confidence', 'frames'} when a
+                sign completes; confidence is how far the distance is below
+                the label's threshold, from 0 at the threshold to 1 for an exact match
+        """
+        t = self.frames
+        self.frames += 1
+
+        best = None
+        for label, threshold, matcher in self.matchers:
+            distance, start = matcher.update(features, t)
+            if distance <= threshold and (best is None or distance < best['distance']):
+                best = {'label': label, 'distance': float(distance), 'frames': t - start + 1,
+                        'confidence': float(1.0 - distance / threshold) if threshold > 0 else 1.0}
+
+        if best is None or t < self.quiet_until:
+            return None
+
+        # Start fresh so the same motion is not reported twice
+        for _, _, matcher in self.matchers:
+            matcher.reset()
+        self.quiet_until = t + self.cooldown
+        return best
+
+
+def save_templates(path, templates):
+    """Save (label, template, threshold) triples to an .npz file"""
+    np.savez(
+        path,
+        labels=np.array([label for label, _, _ in templates]),
+        thresholds=np.array([threshold for _, _, threshold in templates], np.float32),
+        lengths=np.array([len(template) for _, template, _ in templates]),
+        frames=np.concatenate([template for _, template, _ in templates]).astype(np.float32)
+    )
+
+
+def load_templates(path):
+    """Load (label, template, threshold) triples written by save_templates"""
+    data = np.load(path)
+    templates = []
+    offset = 0
+    for label, threshold, length in zip(data['labels'], data['thresholds'], data['lengths']):
+        templates.append((str(label), data['frames'][offset:offset + length], float(threshold)))
+        offset += length
+    return templates
+
+
+class SequenceTracker:
+    """SequenceRecognizers for every streaming session"""
+    def __init__(self, templates, window=60, idle_timeout=1.0):
+        self.templates = templates
+        self.window = window
+        self.idle_timeout = idle_timeout  # Seconds without hands before a session starts over
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Tracker for the templates at path, or None if they have not been trained"""
+        if not os.path.exists(path):
+            return None
+        return cls(load_templates(path), **kwargs)
+
+    def push(self, session_id, hands):
+        """Feed one frame's hands for a session and return a completed sign, if any"""
+        features = landmark_features(hands)
+        if features is None:
+            return None
+
+        now = time.time()
+        with self.lock:
+            state = self.sessions.get(session_id)
+            if state is None or now - state['time'] > self.idle_timeout:
+                state = {'recognizer': SequenceRecognizer(self.templates, self.window)}
+                self.sessions[session_id] = state
+            state['time'] = now
+
+            # Drop sessions that went quiet
+            for key in [k for k, v in self.sessions.items() if now - v['time'] > self.idle_timeout]:
+                del self.sessions[key]
+
+            return state['recognizer'].push(features)
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from admission import AdmissionController, AsyncAdmissionController
+
+
+def _interrupted(timeout=None):
+    raise KeyboardInterrupt
+
+
+async def _enter(controller, session_id):
+    async with controller.admit(session_id):
+        pass
+
+
+class AdmissionControllerTest(unittest.TestCase):
+    def test_interrupted_waiter_leaves_the_queue(self):
+        controller = AdmissionController(max_concurrent=1, default_deadline=5)
+        with controller.admit():
+            controller.cond.wait = _interrupted
+            with self.assertRaises(KeyboardInterrupt):
+                with controller.admit('a'):
+                    pass
+            del controller.cond.wait
+
+        self.assertEqual(len(controller.queue), 0)
+        self.assertEqual(controller.waiting_sessions, {})
+        with controller.admit('b'):
+            self.assertEqual(controller.in_flight, 1)
+
+    def test_simultaneous_releases_start_every_waiter(self):
+        for _ in range(20):
+            controller = AdmissionController(max_concurrent=2, default_deadline=5)
+            controller._acquire(None, None)
+            controller._acquire(None, None)
+
+            admitted = []
+            done = threading.Event()
+
+            def wait_for_slot():
+                with controller.admit(budget=1.0):
+                    admitted.append(time.monotonic())
+                    done.wait()
+
+            waiters = [threading.Thread(target=wait_for_slot) for _ in range(2)]
+            for waiter in waiters:
+                waiter.start()
+                time.sleep(0.01)
+            while len(controller.queue) < 2:
+                time.sleep(0.001)
+            time.sleep(0.01)
+
+            # Both slots free up under one lock, as when a batch resolves
+            with controller.cond:
+                release_time = time.monotonic()
+                controller._release(0.1)
+                controller._release(0.1)
+
+            while len(admitted) < 2 and time.monotonic() - release_time < 2:
+                time.sleep(0.001)
+            done.set()
+            for waiter in waiters:
+                waiter.join()
+
+            self.assertEqual(len(admitted), 2)
+            self.assertLess(max(admitted) - release_time, 0.2)
+
+
+class AsyncAdmissionControllerTest(unittest.TestCase):
+    def test_cancelled_waiter_leaves_the_queue(self):
+        async def scenario():
+            controller = AsyncAdmissionController(max_concurrent=1, default_deadline=5)
+            async with controller.admit():
+                waiter = asyncio.create_task(_enter(controller, 'a'))
+                await asyncio.sleep(0.05)
+                self.assertEqual(len(controller.queue), 1)
+
+                waiter.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await waiter
+                self.assertEqual(len(controller.queue), 0)
+                self.assertEqual(controller.waiting_sessions, {})
+
+            # A ticket left at the head of the queue would hold this until its deadline
+            await asyncio.wait_for(_enter(controller, 'b'), 1)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
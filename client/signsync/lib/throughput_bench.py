@@ -0,0 +1,74 @@
+import argparse
+import base64
+import time
+
+from data_folders import list_samples
+from model_handler import HandSignModel
+
+
+def load_images(data_dir, limit):
+    """
+    Load base64 encoded images from a Data folder tree
+
+    Args:
+        data_dir (str): Folder containing one sub-folder per label
+        limit (int): Maximum number of images to load
+
+    Returns:
+        list: Base64 encoded images
+    """
+    images = []
+    for _, path in list_samples(data_dir)[:limit]:
+        with open(path, 'rb') as file:
+            images.append(base64.b64encode(file.read()).decode('ascii'))
+    return images
+
+
+def measure(model, images, requests, crop):
+    """
+    Submit all requests at once and time until every result is back
+
+    Args:
+        model (HandSignModel): Model to benchmark
+        images (list): Base64 encoded images, cycled through
+        requests (int): Number of requests to submit
+        crop (bool): Use the client crop path instead of full detection
+
+    Returns:
+        float: Requests per second
+    """
+    submit = model.submit_crop if crop else model.submit_image
+    start_time = time.time()
+    futures = [submit(images[i % len(images)]) for i in range(requests)]
+    for future in futures:
+        future.result()
+    return requests / (time.time() - start_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure HandSignModel throughput against worker count")
+    parser.add_argument("--data", default="backendv2/Data")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma separated worker counts")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--crop", action="store_true", help="Benchmark the client crop path")
+    args = parser.parse_args()
+
+    images = load_images(args.data, args.requests)
+    if not images:
+        print("No images found. Exiting.")
+        return
+
+    baseline = None
+    print(f"{'workers':>8} {'req/s':>8} {'speedup':>8}")
+    for workers in [int(w) for w in args.workers.split(',')]:
+        model = HandSignModel(workers=workers)
+        measure(model, images, workers * 2, args.crop)  # Warm up detectors on every worker
+
+        throughput = measure(model, images, args.requests, args.crop)
+        baseline = baseline or throughput
+        print(f"{workers:>8} {throughput:>8.1f} {throughput / baseline:>7.2f}x")
+        model.close()
+
+
+if __name__ == "__main__":
+    main()
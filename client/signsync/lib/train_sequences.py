@@ -0,0 +1,203 @@
+import argparse
+import os
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from sequence import (SequenceRecognizer, StreamingDTW, landmark_features,
+                      save_templates)
+
+
+def load_sequences(data_dir):
+    """
+    Load recorded landmark sequences
+
+    Args:
+        data_dir (str): Folder with one sub-folder of .npy takes per label
+
+    Returns:
+        list: (label, sequence) pairs
+    """
+    sequences = []
+    for label in sorted(os.listdir(data_dir)):
+        label_dir = os.path.join(data_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for filename in sorted(os.listdir(label_dir)):
+            if filename.endswith('.npy'):
+                sequences.append((label, np.load(os.path.join(label_dir, filename))))
+    return sequences
+
+
+def match_distance(template, sequence, window):
+    """Best streaming DTW distance of template anywhere in sequence"""
+    matcher = StreamingDTW(template, window)
+    return min(matcher.update(features, t)[0] for t, features in enumerate(sequence))
+
+
+def train(sequences, per_label, window):
+    """
+    Pick template takes per label and fit their match thresholds
+
+    Templates are the takes with the lowest total distance to the other
+    takes of their label (medoids). Each threshold sits between the
+    distances to the template's own label and to the closest other label.
+
+    Args:
+        sequences (list): (label, sequence) pairs
+        per_label (int): Templates to keep per label
+        window (int): Longest sign in frames
+
+    Returns:
+        list: (label, template, threshold) triples
+    """
+    by_label = defaultdict(list)
+    for label, sequence in sequences:
+        by_label[label].append(sequence)
+
+    templates = []
+    for label, takes in by_label.items():
+        if len(takes) > 1:
+            totals = [
+                sum(match_distance(take, other, window) for j, other in enumerate(takes) if j != i)
+                for i, take in enumerate(takes)
+            ]
+            chosen = [takes[i] for i in np.argsort(totals)[:per_label]]
+        else:
+            chosen = takes
+
+        for template in chosen:
+            positive = [match_distance(template, take, window) for take in takes if take is not template]
+            negative = [
+                match_distance(template, sequence, window)
+                for other, sequence in sequences if other != label
+            ]
+
+            accept = np.percentile(positive, 90) if positive else 0.0
+            reject = min(negative) if negative else accept * 2
+            threshold = (accept + reject) / 2 if reject > accept else accept
+            templates.append((label, template, float(threshold)))
+    return templates
+
+
+def evaluate(sequences, per_label, window):
+    """
+    Leave-one-out evaluation of the streaming recognizer
+
+    Args:
+        sequences (list): (label, sequence) pairs
+        per_label (int): Templates to keep per label
+        window (int): Longest sign in frames
+    """
+    confusion = defaultdict(Counter)
+    push_times = []
+
+    for i, (label, sequence) in enumerate(sequences):
+        templates = train(sequences[:i] + sequences[i + 1:], per_label, window)
+        recognizer = SequenceRecognizer(templates, window)
+
+        predicted = 'none'
+        for features in sequence:
+            start_time = time.perf_counter()
+            match = recognizer.push(features)
+            push_times.append(time.perf_counter() - start_time)
+            if match is not None:
+                predicted = match['label']
+                break
+        confusion[label][predicted] += 1
+
+    correct = sum(confusion[label][label] for label in confusion)
+    print(f"Accuracy: {correct}/{len(sequences)} ({correct / len(sequences):.1%})")
+    for label in sorted(confusion):
+        counts = ', '.join(f"{p}: {n}" for p, n in confusion[label].most_common())
+        print(f"  {label:>12} -> {counts}")
+    print(f"Per-frame update: mean {np.mean(push_times) * 1e3:.2f} ms, "
+          f"p99 {np.percentile(push_times, 99) * 1e3:.2f} ms")
+
+
+def record(data_dir, label, camera):
+    """
+    Record takes of a sign from a webcam
+
+    Press 'r' to start and stop a take, 'q' to quit.
+
+    Args:
+        data_dir (str): Folder with one sub-folder per label
+        label (str): Label being recorded
+        camera (int): Camera index
+    """
+    import cv2
+    from cvzone.HandTrackingModule import HandDetector
+
+    folder = os.path.join(data_dir, label)
+    os.makedirs(folder, exist_ok=True)
+
+    cap = cv2.VideoCapture(camera)
+    detector = HandDetector(maxHands=2)
+    take = None
+
+    while True:
+        success, img = cap.read()
+        if not success:
+            print("Failed to grab frame")
+            break
+
+        hands, img = detector.findHands(img)
+        if take is not None and hands:
+            take.append(landmark_features(hands))
+
+        status = f"Recording {label} ({len(take)} frames)" if take is not None else "Press 'r' to record"
+        cv2.putText(img, status, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.imshow("Record", img)
+
+        key = cv2.waitKey(1)
+        if key == ord('r'):
+            if take is None:
+                take = []
+            else:
+                if take:
+                    filename = os.path.join(folder, f"{time.time()}.npy")
+                    np.save(filename, np.stack(take))
+                    print(f"Saved {len(take)} frames to {filename}")
+                take = None
+        elif key == ord('q'):
+            break
+
+    cap.release()
+    cv2.destroyAllWindows()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record, train and evaluate dynamic sign templates")
+    parser.add_argument("command", choices=["record", "train", "eval"])
+    parser.add_argument("--data", default="Sequences", help="Folder with one sub-folder of takes per label")
+    parser.add_argument("--output", default="Model/sequence_templates.npz")
+    parser.add_argument("--label", help="Label to record")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--per-label", type=int, default=3, help="Templates kept per label")
+    parser.add_argument("--window", type=int, default=60, help="Longest sign in frames")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        if not args.label:
+            parser.error("record needs --label")
+        record(args.data, args.label, args.camera)
+        return
+
+    sequences = load_sequences(args.data)
+    if not sequences:
+        print("No recorded sequences found. Exiting.")
+        return
+
+    if args.command == "train":
+        templates = train(sequences, args.per_label, args.window)
+        save_templates(args.output, templates)
+        print(f"Saved {len(templates)} templates for "
+              f"{len(set(label for label, _, _ in templates))} labels to {args.output}")
+    else:
+        evaluate(sequences, args.per_label, args.window)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import base64
+import http.client
+import json
+import uuid
+from urllib.parse import urlsplit
+
+from compact import COMPACT_MIMETYPE
+
+
+def response_bytes(response, body):
+    """Bytes of a response on the wire: status line, headers and the (possibly gzipped) body"""
+    head = f"HTTP/1.1 {response.status} {response.reason}\r\n"
+    head += "".join(f"{name}: {value}\r\n" for name, value in response.getheaders()) + "\r\n"
+    return len(head.encode('latin-1')) + len(body)
+
+
+def measure(connection, image, frames, headers):
+    """
+    Post the same frame repeatedly over one keep-alive connection
+
+    Returns:
+        tuple: (words translated, response bytes)
+    """
+    payload = json.dumps({'image': image})
+    words = 0
+    received = 0
+    for _ in range(frames):
+        connection.request('POST', '/api/translate', body=payload,
+                           headers=dict(headers, **{'Content-Type': 'application/json'}))
+        response = connection.getresponse()
+        body = response.read()
+        received += response_bytes(response, body)
+        if response.status == 200:
+            words += 1
+    return words, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure response bytes on the wire per translated word")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--image", default="backendv2/Data/Yes/Image_1740170822.636752.jpg")
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(args.image, 'rb') as file:
+        image = base64.b64encode(file.read()).decode('ascii')
+
+    host = urlsplit(args.url).netloc
+    modes = [
+        ('json', {'Accept': 'application/json'}),
+        ('json+gzip', {'Accept': 'application/json', 'Accept-Encoding': 'gzip'}),
+        ('compact', {'Accept': COMPACT_MIMETYPE, 'Accept-Encoding': 'gzip'})
+    ]
+
+    print(f"{'mode':>10} {'words':>6} {'bytes/word':>11}")
+    for name, headers in modes:
+        connection = http.client.HTTPConnection(host, timeout=30)
+        headers = dict(headers, **{'X-Session-Id': uuid.uuid4().hex})
+        words, received = measure(connection, image, args.frames, headers)
+        connection.close()
+        print(f"{name:>10} {words:>6} {received / max(words, 1):>11.1f}")
+
+    # The label table is fetched once, then only revalidated
+    connection = http.client.HTTPConnection(host, timeout=30)
+    for name, headers in (('labels', {}), ('labels+gzip', {'Accept-Encoding': 'gzip'})):
+        connection.request('GET', '/api/labels', headers=headers)
+        response = connection.getresponse()
+        body = response.read()
+        print(f"{name:>12}: {response_bytes(response, body)} bytes")
+
+    etag = response.getheader('ETag')
+    connection.request('GET', '/api/labels', headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+    response = connection.getresponse()
+    body = response.read()
+    print(f"{'revalidate':>12}: {response_bytes(response, body)} bytes ({response.status})")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
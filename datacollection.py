@@ -4,12 +4,13 @@ import numpy as np
 import math
 import time
 import os
+import argparse
 
+import headless
 
-# Function to process a single hand
-def process_hand(img, hand, imgSize, offset):
-    global imgWhite
 
+# Function to process a single hand
+def process_hand(img, hand, imgSize, offset, show=True):
     x, y, w, h = hand['bbox']
 
     # Create a white background image
@@ -20,7 +21,7 @@ def process_hand(img, hand, imgSize, offset):
               max(0, x - offset):min(img.shape[1], x + w + offset)]
 
     if imgCrop.size == 0:
-        return
+        return None
 
     aspectRatio = h / w
 
@@ -39,14 +40,15 @@ def process_hand(img, hand, imgSize, offset):
         hGap = math.ceil((imgSize - hCal) / 2)
         imgWhite[hGap:hCal + hGap, :] = imgResize
 
-    cv2.imshow("ImageCrop", imgCrop)
-    cv2.imshow("ImageWhite", imgWhite)
+    if show:
+        cv2.imshow("ImageCrop", imgCrop)
+        cv2.imshow("ImageWhite", imgWhite)
 
+    return imgWhite
 
-# Function to process both hands together
-def process_double_hands(img, hands, imgSize, offset):
-    global imgWhite
 
+# Function to process both hands together
+def process_double_hands(img, hands, imgSize, offset, show=True):
     # Find the bounding box that encompasses both hands
     min_x = min(hands[0]['bbox'][0], hands[1]['bbox'][0])
     min_y = min(hands[0]['bbox'][1], hands[1]['bbox'][1])
@@ -67,7 +69,7 @@ def process_double_hands(img, hands, imgSize, offset):
               max(0, min_x - offset):min(img.shape[1], max_x + offset)]
 
     if imgCrop.size == 0:
-        return
+        return None
 
     aspectRatio = h / w
 
@@ -86,50 +88,83 @@ def process_double_hands(img, hands, imgSize, offset):
         hGap = math.ceil((imgSize - hCal) / 2)
         imgWhite[hGap:hCal + hGap, :] = imgResize
 
-    cv2.imshow("ImageCrop", imgCrop)
-    cv2.imshow("ImageWhite", imgWhite)
-
-
-# Create the data folder if it doesn't exist
-os.makedirs("Data/No", exist_ok=True)
-
-cap = cv2.VideoCapture(0)
-detector = HandDetector(maxHands=2)  # Set to detect up to 2 hands
-
-offset = 20
-imgSize = 300
-
-folder = "Data/No"
-counter = 0
-
-# Current mode: 'single' or 'double'
-mode = 'single'
-imgWhite = None
-
-while True:
-    success, img = cap.read()
-    hands, img = detector.findHands(img)
-
-    # Display current mode on the image
-    cv2.putText(img, f"Mode: {mode}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-    cv2.putText(img, "Press 'm' to switch mode", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-    cv2.putText(img, "Press 's' to save", (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-
-    if hands:
-        if mode == 'single' and len(hands) > 0:
-            # Process only the first detected hand
-            process_hand(img, hands[0], imgSize, offset)
-
-        elif mode == 'double' and len(hands) >= 2:
-            # Process both hands together in a single image
-            process_double_hands(img, hands, imgSize, offset)
-
-    cv2.imshow("Image", img)
-    key = cv2.waitKey(1)
-
-    if key == ord("s"):
-        if ((mode == 'single' and len(hands) > 0) or
-            (mode == 'double' and len(hands) >= 2)) and imgWhite is not None:
+    if show:
+        cv2.imshow("ImageCrop", imgCrop)
+        cv2.imshow("ImageWhite", imgWhite)
+
+    return imgWhite
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect hand crops for training")
+    headless.add_arguments(parser)
+    parser.add_argument("--folder", default="Data/No", help="Where to save the crops")
+    parser.add_argument("--save-every", type=int, default=0,
+                        help="Headless: save every Nth usable frame (0 saves only on SIGUSR2)")
+    parser.add_argument("--limit", type=int, default=0, help="Headless: stop after saving this many crops")
+    args = parser.parse_args()
+
+    folder = args.folder
+
+    # Create the data folder if it doesn't exist
+    os.makedirs(folder, exist_ok=True)
+
+    cap = headless.FrameSource(args.source)
+    detector = HandDetector(maxHands=2)  # Set to detect up to 2 hands
+
+    offset = 20
+    imgSize = 300
+
+    counter = 0
+    usable = 0
+
+    # Current mode: 'single' or 'double'
+    switch = headless.ModeSwitch(args.mode)
+    save_requested = False
+
+    def request_save():
+        nonlocal save_requested
+        save_requested = True
+
+    if args.headless:
+        switch.install_signals(on_save=request_save)
+
+    while switch.running:
+        success, img = cap.read()
+        if not success:
+            print("Failed to grab frame")
+            break
+        hands, img = detector.findHands(img)
+        mode = switch.mode
+
+        if not args.headless:
+            # Display current mode on the image
+            cv2.putText(img, f"Mode: {mode}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            cv2.putText(img, "Press 'm' to switch mode", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            cv2.putText(img, "Press 's' to save", (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+        imgWhite = None
+        if hands:
+            if mode == 'single' and len(hands) > 0:
+                # Process only the first detected hand
+                imgWhite = process_hand(img, hands[0], imgSize, offset, show=not args.headless)
+
+            elif mode == 'double' and len(hands) >= 2:
+                # Process both hands together in a single image
+                imgWhite = process_double_hands(img, hands, imgSize, offset, show=not args.headless)
+
+        if args.headless:
+            key = None
+            if imgWhite is not None:
+                usable += 1
+                if save_requested or (args.save_every and usable % args.save_every == 0):
+                    key = ord("s")
+                    save_requested = False
+        else:
+            cv2.imshow("Image", img)
+            key = cv2.waitKey(1)
+
+        if key == ord("s") and imgWhite is not None:
             counter += 1
             # Save the appropriate image based on mode
             if mode == 'single':
@@ -137,15 +172,21 @@ while True:
             else:
                 cv2.imwrite(f'{folder}/Double_{time.time()}.jpg', imgWhite)
             print(f"Saved image {counter}")
+            if args.headless and args.limit and counter >= args.limit:
+                break
+
+        # Switch between single and double hand modes
+        if key == ord('m'):
+            switch.toggle()
+
+        # Exit on 'q'
+        if key == ord('q'):
+            break
 
-    # Switch between single and double hand modes
-    if key == ord('m'):
-        mode = 'double' if mode == 'single' else 'single'
-        print(f"Switched to {mode} hand mode")
+    cap.release()
+    if not args.headless:
+        cv2.destroyAllWindows()
 
-    # Exit on 'q'
-    if key == ord('q'):
-        break
 
-cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
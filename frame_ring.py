@@ -0,0 +1,338 @@
+import multiprocessing
+import time
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import headless
+
+RingFrame = namedtuple('RingFrame', ['number', 'frame', 'slot', 'seq'])
+
+# Header words
+WRITTEN, RELEASED, HELD, LATEST, SHUTDOWN, SLOTS, SLOT_BYTES = range(7)
+HEADER_WORDS = 8
+
+# Per slot words: seqlock counter, frame number, ndim, shape
+SEQ, NUMBER, NDIM, SHAPE = 0, 1, 2, 3
+META_WORDS = 6
+
+POLL_INTERVAL = 0.0005  # Seconds between polls while waiting on the other side
+
+
+def _open_shared_memory(name):
+    try:
+        # Python 3.13+: the creator owns the block, don't let our tracker unlink it
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Older versions register every attach with the resource tracker, which
+        # then warns about, or unlinks, a block this process never created
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class FrameRing:
+    """
+    Preallocated frame slots in shared memory for one producer and one consumer process
+
+    Frames are written into a slot once and read as numpy views of it, so
+    nothing is pickled or copied on the way to the consumer.
+
+    Each slot has a seqlock counter. The writer makes it odd while filling
+    the slot and even again when done, and the reader only takes a slot whose
+    counter was even and did not change while it claimed it. The slot the
+    reader holds is never overwritten, so a view stays intact until the next
+    read() or release(). valid() re-checks the counter as a final guard.
+    """
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=shm.buf)
+        self.slots = int(self.header[SLOTS])
+        self.slot_bytes = int(self.header[SLOT_BYTES])
+        self.meta = np.ndarray((self.slots, META_WORDS), dtype=np.uint64, buffer=shm.buf,
+                               offset=HEADER_WORDS * 8)
+        self.data_offset = (HEADER_WORDS + self.slots * META_WORDS) * 8
+
+    @classmethod
+    def create(cls, slots, max_shape):
+        """
+        Allocate a ring of uint8 frames
+
+        Args:
+            slots (int): Number of frame slots, at least 3
+            max_shape (tuple): Largest frame shape that will be written
+        """
+        if slots < 3:
+            raise ValueError("A frame ring needs at least 3 slots")
+
+        # Keep every slot cache line aligned
+        slot_bytes = (int(np.prod(max_shape)) + 63) // 64 * 64
+        size = (HEADER_WORDS + slots * META_WORDS) * 8 + slots * slot_bytes
+        shm = shared_memory.SharedMemory(create=True, size=size)
+
+        header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=shm.buf)
+        header[:] = 0
+        header[SLOTS] = slots
+        header[SLOT_BYTES] = slot_bytes
+        header[LATEST] = slots - 1
+        del header
+
+        ring = cls(shm, owner=True)
+        ring.meta[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        """Open a ring created by another process"""
+        return cls(_open_shared_memory(name))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def is_shutdown(self):
+        return bool(self.header[SHUTDOWN])
+
+    def shutdown(self):
+        """Tell the other side to stop; the reader still drains written frames"""
+        self.header[SHUTDOWN] = 1
+
+    def _view(self, slot, shape):
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf,
+                          offset=self.data_offset + slot * self.slot_bytes)
+
+    def write(self, frame, block=False):
+        """
+        Copy a frame into the next free slot
+
+        Args:
+            frame (numpy.ndarray): uint8 frame no larger than max_shape
+            block (bool): Wait for the reader instead of overwriting frames it
+                has not read yet (for files, where every frame counts)
+
+        Returns:
+            int or None: Frame number, or None if the ring was shut down
+        """
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.nbytes > self.slot_bytes or frame.ndim > 3:
+            raise ValueError(f"Frame of shape {frame.shape} does not fit a ring slot")
+
+        if block:
+            # One slot stays free for the frame the reader holds
+            while int(self.header[WRITTEN]) - int(self.header[RELEASED]) >= self.slots - 1:
+                if self.is_shutdown:
+                    return None
+                time.sleep(POLL_INTERVAL)
+        elif self.is_shutdown:
+            return None
+
+        slot = int(self.header[LATEST])
+        while True:
+            slot = (slot + 1) % self.slots
+            if int(self.header[HELD]) == slot + 1:
+                continue
+
+            self.meta[slot, SEQ] += 1  # Odd: slot is being written
+            if int(self.header[HELD]) != slot + 1:
+                break
+            # The reader claimed this slot before it saw the odd counter
+            self.meta[slot, SEQ] += 1
+
+        number = int(self.header[WRITTEN]) + 1
+        self._view(slot, frame.shape)[...] = frame
+        self.meta[slot, NUMBER] = number
+        self.meta[slot, NDIM] = frame.ndim
+        self.meta[slot, SHAPE:SHAPE + frame.ndim] = frame.shape
+        self.meta[slot, SEQ] += 1  # Even: slot is complete
+
+        self.header[LATEST] = slot
+        self.header[WRITTEN] = number
+        return number
+
+    def read(self, after=0, latest=True):
+        """
+        Claim a frame newer than `after` without copying it
+
+        Args:
+            after (int): Number of the last frame the caller has seen
+            latest (bool): Skip to the newest frame, otherwise take after + 1
+
+        Returns:
+            RingFrame or None: None if no newer frame has been written yet
+        """
+        while True:
+            if int(self.header[WRITTEN]) <= after:
+                return None
+
+            if latest:
+                slot = int(self.header[LATEST])
+            else:
+                matches = np.flatnonzero(self.meta[:, NUMBER] == after + 1)
+                if len(matches) == 0:
+                    return None
+                slot = int(matches[0])
+
+            seq = int(self.meta[slot, SEQ])
+            if seq % 2:
+                continue
+
+            self.header[HELD] = slot + 1
+            if int(self.meta[slot, SEQ]) != seq:
+                continue
+
+            number = int(self.meta[slot, NUMBER])
+            if number <= after or (not latest and number != after + 1):
+                continue
+
+            ndim = int(self.meta[slot, NDIM])
+            shape = tuple(int(v) for v in self.meta[slot, SHAPE:SHAPE + ndim])
+            return RingFrame(number, self._view(slot, shape), slot, seq)
+
+    def get(self, after=0, latest=True, timeout=None):
+        """read() that waits for the writer; None once it has shut down and everything is read"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            item = self.read(after, latest)
+            if item is not None:
+                return item
+            if self.is_shutdown and int(self.header[WRITTEN]) <= after:
+                return None
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(POLL_INTERVAL)
+
+    def valid(self, item):
+        """Whether the slot still holds the frame read() returned"""
+        return int(self.meta[item.slot, SEQ]) == item.seq
+
+    def release(self, item):
+        """Hand the slot back to the writer, returning whether the frame stayed intact"""
+        intact = self.valid(item)
+        self.header[RELEASED] = item.number
+        self.header[HELD] = 0
+        return intact
+
+    def close(self):
+        # Views into the buffer must be gone before it can be unmapped
+        self.header = None
+        self.meta = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+
+def _capture(source, slots, lossless, conn):
+    """Capture process: read frames from the source into a new ring"""
+    cap = headless.FrameSource(source)
+    success, img = cap.read()
+    if not success:
+        conn.send(None)
+        return
+
+    ring = FrameRing.create(slots, img.shape)
+    conn.send(ring.name)
+
+    # The name can go once the consumer has attached, the mapping stays
+    conn.recv()
+    ring.unlink()
+
+    try:
+        while success:
+            if ring.write(img, block=lossless) is None:
+                break
+            success, img = cap.read()
+    finally:
+        ring.shutdown()
+        cap.release()
+        ring.close()
+
+
+class CaptureProcess:
+    """
+    Frame source that captures in a child process and hands frames over through a FrameRing
+
+    Reads like cv2.VideoCapture. A returned frame is a view into shared
+    memory and stays valid until the next read(). Frames found overwritten
+    are dropped and counted in `torn`.
+
+    Args:
+        source (str or int): Camera index, video file path or image folder
+        slots (int): Ring size
+        lossless (bool): Deliver every frame instead of only the newest;
+            defaults to True for files and folders and False for cameras
+    """
+    def __init__(self, source=0, slots=4, lossless=None):
+        if lossless is None:
+            lossless = not str(source).isdigit()
+        self.lossless = lossless
+        self.ring = None
+        self.item = None
+        self.last = 0
+        self.torn = 0
+
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_capture, args=(source, slots, lossless, child_conn), daemon=True
+        )
+        self.process.start()
+        # Only the child may hold its end, so recv() sees EOF if the child dies first
+        child_conn.close()
+
+        try:
+            name = parent_conn.recv()
+        except EOFError:
+            name = None
+        if name is not None:
+            self.ring = FrameRing.attach(name)
+            parent_conn.send(True)
+        parent_conn.close()
+
+    def isOpened(self):
+        return self.ring is not None
+
+    def read(self):
+        if self.ring is None:
+            return False, None
+        if self.item is not None:
+            if not self.ring.release(self.item):
+                # The caller already used it, all that is left is to report it
+                self._torn(self.item)
+            self.item = None
+
+        while True:
+            item = self.ring.get(self.last, latest=not self.lossless)
+            if item is None:
+                return False, None
+            if self.ring.valid(item):
+                break
+            self.ring.release(item)
+            self._torn(item)
+            self.last = item.number
+
+        self.item = item
+        self.last = item.number
+        return True, item.frame
+
+    def _torn(self, item):
+        self.torn += 1
+        print(f"Frame {item.number} was overwritten while it was read ({self.torn} so far)")
+
+    def release(self):
+        if self.ring is None:
+            return
+        self.item = None
+        self.ring.shutdown()
+        self.process.join(timeout=2.0)
+        self.ring.close()
+        self.ring = None
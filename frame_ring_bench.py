@@ -0,0 +1,90 @@
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+from frame_ring import FrameRing
+
+
+def produce_queue(queue, frames, shape):
+    frame = np.random.randint(0, 255, shape, dtype=np.uint8)
+    for i in range(frames):
+        frame[0, 0, 0] = i % 256
+        queue.put(frame)
+    queue.put(None)
+
+
+def produce_ring(name, frames, shape):
+    ring = FrameRing.attach(name)
+    frame = np.random.randint(0, 255, shape, dtype=np.uint8)
+    for i in range(frames):
+        frame[0, 0, 0] = i % 256
+        ring.write(frame, block=True)
+    ring.shutdown()
+    ring.close()
+
+
+def bench_queue(frames, shape, work):
+    queue = multiprocessing.Queue(maxsize=4)
+    process = multiprocessing.Process(target=produce_queue, args=(queue, frames, shape))
+    process.start()
+
+    received = 0
+    start_time = time.time()
+    while True:
+        frame = queue.get()
+        if frame is None:
+            break
+        received += int(frame[0, 0, 0] >= 0)
+        if work:
+            time.sleep(work)
+    elapsed = time.time() - start_time
+    process.join()
+    return received / elapsed
+
+
+def bench_ring(frames, shape, work):
+    ring = FrameRing.create(4, shape)
+    process = multiprocessing.Process(target=produce_ring, args=(ring.name, frames, shape))
+    process.start()
+
+    received = 0
+    last = 0
+    start_time = time.time()
+    while True:
+        item = ring.get(last, latest=False)
+        if item is None:
+            break
+        received += int(item.frame[0, 0, 0] >= 0)
+        if work:
+            time.sleep(work)
+        last = item.number
+        ring.release(item)
+    elapsed = time.time() - start_time
+
+    process.join()
+    ring.close()
+    ring.unlink()
+    return received / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frames/sec through a multiprocessing.Queue vs a shared memory FrameRing")
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--work-ms", type=float, default=0.0, help="Simulated per-frame consumer work")
+    args = parser.parse_args()
+
+    shape = (args.height, args.width, 3)
+    work = args.work_ms / 1000
+
+    print(f"{args.frames} frames of {args.width}x{args.height}, {args.work_ms} ms consumer work")
+    print(f"{'transport':>10} {'frames/s':>10}")
+    for name, bench in (('queue', bench_queue), ('ring', bench_ring)):
+        print(f"{name:>10} {bench(args.frames, shape, work):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import json
+import os
+import signal
+import socket
+import sys
+import time
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FrameSource:
+    """
+    Frames from a camera, a video file or a folder of images
+
+    Reads like cv2.VideoCapture so the capture loops stay unchanged.
+
+    Args:
+        source (str or int): Camera index, video file path or image folder
+    """
+    def __init__(self, source=0):
+        self.cap = None
+        self.files = None
+        self.position = 0
+
+        if isinstance(source, str) and os.path.isdir(source):
+            self.files = sorted(
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            self.cap = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+
+    def isOpened(self):
+        if self.files is not None:
+            return len(self.files) > 0
+        return self.cap.isOpened()
+
+    def read(self):
+        if self.files is None:
+            return self.cap.read()
+
+        while self.position < len(self.files):
+            img = cv2.imread(self.files[self.position])
+            self.position += 1
+            if img is not None:
+                return True, img
+        return False, None
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+class LabelSink:
+    """
+    Writes one JSON line per record
+
+    Args:
+        target (str): '-' for stdout, 'tcp://host:port' or 'unix:///path'
+            for a local socket, anything else is a file appended to
+    """
+    RECONNECT_INTERVAL = 1.0  # Seconds between socket connection attempts
+
+    def __init__(self, target='-'):
+        self.target = target
+        self.file = None
+        self.sock = None
+        self.next_connect = 0.0
+
+        if target == '-':
+            # Keras progress bars and library logs also write to stdout, so
+            # keep the real stdout for records and send everything else to stderr
+            sys.stdout.flush()
+            self.file = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+            os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+        elif not target.startswith(('tcp://', 'unix://')):
+            self.file = open(target, 'a')
+
+    def emit(self, record):
+        line = json.dumps(dict(record, time=time.time())) + "\n"
+
+        if self.file is not None:
+            self.file.write(line)
+            self.file.flush()
+            return
+
+        # The consumer may start after us or restart, so drop the frame and retry later
+        if self.sock is None and not self._connect():
+            return
+        try:
+            self.sock.sendall(line.encode('utf-8'))
+        except OSError:
+            self.sock.close()
+            self.sock = None
+
+    def _connect(self):
+        now = time.monotonic()
+        if now < self.next_connect:
+            return False
+        self.next_connect = now + self.RECONNECT_INTERVAL
+
+        try:
+            if self.target.startswith('unix://'):
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(self.target[len('unix://'):])
+            else:
+                host, port = self.target[len('tcp://'):].rsplit(':', 1)
+                sock = socket.create_connection((host, int(port)), timeout=1.0)
+        except OSError as e:
+            print(f"Could not connect to {self.target}: {e}", file=sys.stderr)
+            return False
+
+        self.sock = sock
+        return True
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+        if self.file is not None:
+            self.file.close()
+
+
+class ModeSwitch:
+    """
+    Single/double hand mode and run state for loops without a window
+
+    SIGUSR1 toggles the mode, SIGUSR2 calls on_save (the data collector
+    saves the next crop) and SIGINT/SIGTERM stop the loop cleanly.
+    """
+    def __init__(self, mode='single'):
+        self.mode = mode
+        self.running = True
+        self.on_save = None
+
+    def toggle(self):
+        self.mode = 'double' if self.mode == 'single' else 'single'
+        print(f"Switched to {self.mode} hand mode", file=sys.stderr)
+
+    def stop(self):
+        self.running = False
+
+    def install_signals(self, on_save=None):
+        self.on_save = on_save
+        signal.signal(signal.SIGINT, lambda signum, frame: self.stop())
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+
+        # Windows has no user signals
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.toggle())
+        if hasattr(signal, 'SIGUSR2') and on_save is not None:
+            signal.signal(signal.SIGUSR2, lambda signum, frame: self.on_save())
+
+
+def add_arguments(parser, modes=True):
+    """Command line options shared by the interpreters and the data collectors"""
+    parser.add_argument("--headless", action="store_true",
+                        help="No windows or key polling" + ("; switch mode with SIGUSR1" if modes else ""))
+    parser.add_argument("--source", default="0", help="Camera index, video file or image folder")
+    if modes:
+        parser.add_argument("--mode", choices=["single", "double"], default="single")
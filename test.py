@@ -2,9 +2,13 @@ import cv2
 from cvzone.HandTrackingModule import HandDetector
 from cvzone.ClassificationModule import Classifier
 import numpy as np
+import argparse
 import math
 import os
 
+import headless
+from frame_ring import CaptureProcess
+
 
 def load_labels(labels_path):
     """
@@ -29,7 +33,7 @@ def load_labels(labels_path):
         return []
 
 
-def process_hand(img, hand, imgSize, offset, classifier, labels, imgOutput):
+def process_hand(img, hand, imgSize, offset, classifier, labels, imgOutput, show=True):
     """
     Process a single hand for classification
 
@@ -41,9 +45,11 @@ def process_hand(img, hand, imgSize, offset, classifier, labels, imgOutput):
         classifier (Classifier): Hand gesture classifier
         labels (list): List of hand gesture labels
         imgOutput (numpy.ndarray): Output image for drawing predictions
+        show (bool): Draw the prediction and show the intermediate images
 
     Returns:
-        numpy.ndarray or None: Processed white background image
+        tuple or None: (white background image, label, confidence), label is
+            None if the prediction failed
     """
     x, y, w, h = hand['bbox']
 
@@ -57,6 +63,9 @@ def process_hand(img, hand, imgSize, offset, classifier, labels, imgOutput):
     if imgCrop.size == 0:
         return None
 
+    label = None
+    confidence = None
+
     aspectRatio = h / w
 
     if aspectRatio > 1:
@@ -76,13 +85,17 @@ def process_hand(img, hand, imgSize, offset, classifier, labels, imgOutput):
 
     try:
         # Get prediction
-        prediction, index = classifier.getPrediction(imgWhite)
+        prediction, index = classifier.getPrediction(imgWhite, draw=False)
 
         # Ensure index is within labels range
         if 0 <= index < len(labels):
+            label = labels[index]
+            confidence = float(prediction[index])
+
+        if label is not None and show:
             # Draw prediction text
             cv2.putText(imgOutput,
-                        f"{labels[index]} ({prediction:.2f})",
+                        f"{label} ({confidence:.2f})",
                         (x, y - 20),
                         cv2.FONT_HERSHEY_SIMPLEX,
                         0.7,
@@ -92,13 +105,14 @@ def process_hand(img, hand, imgSize, offset, classifier, labels, imgOutput):
         print(f"Prediction error: {e}")
 
     # Optional: Show intermediate images for debugging
-    cv2.imshow("ImageCrop", imgCrop)
-    cv2.imshow("ImageWhite", imgWhite)
+    if show:
+        cv2.imshow("ImageCrop", imgCrop)
+        cv2.imshow("ImageWhite", imgWhite)
 
-    return imgWhite
+    return imgWhite, label, confidence
 
 
-def process_double_hands(img, hands, imgSize, offset, classifier, labels, imgOutput):
+def process_double_hands(img, hands, imgSize, offset, classifier, labels, imgOutput, show=True):
     """
     Process two hands together for classification
 
@@ -110,9 +124,11 @@ def process_double_hands(img, hands, imgSize, offset, classifier, labels, imgOut
         classifier (Classifier): Hand gesture classifier
         labels (list): List of hand gesture labels
         imgOutput (numpy.ndarray): Output image for drawing predictions
+        show (bool): Draw the prediction and show the intermediate images
 
     Returns:
-        numpy.ndarray or None: Processed white background image
+        tuple or None: (white background image, label, confidence), label is
+            None if the prediction failed
     """
     # Find the bounding box that encompasses both hands
     min_x = min(hands[0]['bbox'][0], hands[1]['bbox'][0])
@@ -136,6 +152,9 @@ def process_double_hands(img, hands, imgSize, offset, classifier, labels, imgOut
     if imgCrop.size == 0:
         return None
 
+    label = None
+    confidence = None
+
     aspectRatio = h / w
 
     if aspectRatio > 1:
@@ -153,20 +172,53 @@ def process_double_hands(img, hands, imgSize, offset, classifier, labels, imgOut
         hGap = math.ceil((imgSize - hCal) / 2)
         imgWhite[hGap:hCal + hGap, :] = imgResize
 
+    try:
+        # Get prediction for the combined crop
+        prediction, index = classifier.getPrediction(imgWhite, draw=False)
+
+        # Ensure index is within labels range
+        if 0 <= index < len(labels):
+            label = labels[index]
+            confidence = float(prediction[index])
+
+        if label is not None and show:
+            # Draw prediction text
+            cv2.putText(imgOutput,
+                        f"{label} ({confidence:.2f})",
+                        (min_x, min_y - 20),
+                        cv2.FONT_HERSHEY_SIMPLEX,
+                        0.7,
+                        (255, 0, 255),
+                        2)
+    except Exception as e:
+        print(f"Prediction error: {e}")
+
     # Optional: Show intermediate images for debugging
-    cv2.imshow("ImageCrop", imgCrop)
-    cv2.imshow("ImageWhite", imgWhite)
+    if show:
+        cv2.imshow("ImageCrop", imgCrop)
+        cv2.imshow("ImageWhite", imgWhite)
 
-    return imgWhite
+    return imgWhite, label, confidence
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Real-time sign language interpreter")
+    headless.add_arguments(parser)
+    parser.add_argument("--output", default="-",
+                        help="Headless label output: '-' (stdout), a JSONL file, tcp://host:port or unix:///path")
+    parser.add_argument("--capture-process", action="store_true",
+                        help="Capture in a separate process and pass frames through shared memory")
+    args = parser.parse_args()
+
     # Initialize video capture
-    cap = cv2.VideoCapture(0)
+    if args.capture_process:
+        cap = CaptureProcess(args.source)
+    else:
+        cap = headless.FrameSource(args.source)
 
-    # Check if camera opened successfully
+    # Check if the source opened successfully
     if not cap.isOpened():
-        print("Error: Could not open camera.")
+        print(f"Error: Could not open video source {args.source}.")
         return
 
     # Initialize hand detector and classifier
@@ -186,34 +238,50 @@ def main():
     imgSize = 300
 
     # Current mode: 'single' or 'double'
-    mode = 'single'
-
-    while True:
-        # Read frame from camera
+    switch = headless.ModeSwitch(args.mode)
+    sink = None
+    if args.headless:
+        switch.install_signals()
+        sink = headless.LabelSink(args.output)
+
+    frame = 0
+    while switch.running:
+        # Read frame from source
         success, img = cap.read()
 
         if not success:
             print("Failed to grab frame")
             break
+        frame += 1
 
         # Create a copy for output
-        imgOutput = img.copy()
+        imgOutput = img if args.headless else img.copy()
 
         # Detect hands
         hands, img = detector.findHands(img)
+        mode = switch.mode
 
-        # Display current mode and instructions
-        cv2.putText(img, f"Mode: {mode}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        cv2.putText(img, "Press 'm' to switch mode", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        if not args.headless:
+            # Display current mode and instructions
+            cv2.putText(img, f"Mode: {mode}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            cv2.putText(img, "Press 'm' to switch mode", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
+        result = None
         if hands:
             if mode == 'single' and len(hands) > 0:
                 # Process only the first detected hand
-                process_hand(img, hands[0], imgSize, offset, classifier, labels, imgOutput)
+                result = process_hand(img, hands[0], imgSize, offset, classifier, labels, imgOutput,
+                                      show=not args.headless)
 
             elif mode == 'double' and len(hands) >= 2:
                 # Process both hands together
-                process_double_hands(img, hands, imgSize, offset, classifier, labels, imgOutput)
+                result = process_double_hands(img, hands, imgSize, offset, classifier, labels, imgOutput,
+                                              show=not args.headless)
+
+        if args.headless:
+            if result is not None and result[1] is not None:
+                sink.emit({'frame': frame, 'mode': mode, 'label': result[1], 'confidence': result[2]})
+            continue
 
         # Display the image
         cv2.imshow("Hand Detection", imgOutput)
@@ -222,13 +290,16 @@ def main():
         key = cv2.waitKey(1) & 0xFF
         if key == ord('m'):
             # Toggle mode between single and double
-            mode = 'double' if mode == 'single' else 'single'
+            switch.toggle()
         elif key == 27:  # ESC key
             break
 
     # Cleanup
     cap.release()
-    cv2.destroyAllWindows()
+    if sink is not None:
+        sink.close()
+    else:
+        cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":